@@ -1,4 +1,5 @@
 from src.fight.local_battle import local_battle
 from src.game.beat_the_plan.beat_the_plan_referee import BeatThePlanReferee
 
-local_battle(BeatThePlanReferee())
+if __name__ == '__main__':
+    local_battle(BeatThePlanReferee())
@@ -1,13 +1,114 @@
-
 from argparse import ArgumentParser, RawTextHelpFormatter
 from src.referee import logs
 from src.referee.referee import Player
-from os.path import splitext, basename
-from itertools import count
+from os.path import splitext, basename, join
+from collections import Counter
 import random
+import sys
+import time
 
 OUTPUT_DIRECTORY = './html/'
 OUTPUT_FILENAME = 'results.json'
+OUTPUT_PATH = join(OUTPUT_DIRECTORY, OUTPUT_FILENAME)
+
+# Minimum time (in seconds) between two displays of the progress of the battles with the option -s
+PROGRESS_PERIOD = 0.1
+
+# Description and epilog of the help message, formatted with the name and the author of the game, and the name of the
+# file to run
+DESCRIPTION = """
+Tool for testing bots for the game %s
+Author:  %s
+
+Should be run in a folder containing :
+- an html folder
+"""
+
+EPILOG = """
+EXAMPLE
+=======
+python3 %s.py ./localIAs/ai1.sync /home/.../myai.sync
+runs a battle with the bots from the two selected files  
+
+OUTPUT
+======
+If the -s option is given, print some statistics on the console. 
+Otherwise, produce a json file and save it to the file ./html/results.json. 
+The file contains the necessary information to display the battle. It can then be read 
+using the PHP script ./html/index.php. 
+
+To do so, you can use the php server software of your choice. On most of the linux 
+distribution, the simplest way consists in using the php -S command:
+> cd html
+> php -S localhost:8888
+> firefox index.php 
+"""
+
+
+class _LocalBattleArgumentParser(ArgumentParser):
+    """
+    Parser of the options of local_battle. The description and the epilog are only formatted with the informations of
+    the referee when the help message is displayed.
+    """
+
+    def __init__(self, referee):
+        """
+        :param referee: the referee of the game tested by the user
+        """
+        super().__init__(referee.get_name(), description=DESCRIPTION, epilog=EPILOG,
+                         formatter_class=RawTextHelpFormatter)
+        self._referee = referee
+
+    def format_help(self):
+        self.description = DESCRIPTION % (self._referee.get_name(), self._referee.get_author())
+        self.epilog = EPILOG % self._referee.get_filename()
+        return super().format_help()
+
+
+def _run_one_battle(battle):
+    """
+    Run one battle of the statistics mode (option -s). This function is executed in a worker process, the referee is
+    then built again and the timeouts and the random seed are given explicitly so that the result does not depend on
+    the process running the battle.
+
+    :param battle: tuple (referee class, scripts, seed, first timeout, timeout)
+    :return: two tuples containing, for each player (in the order of the scripts), the score of the player or None if
+    the player lost, and the rank of the player in the battle (see _get_ranks).
+    """
+    referee_class, scripts, seed, first_timeout, timeout = battle
+
+    Player.FIRST_MAX_ELEMENTARY_OPERATIONS_TIMEOUT = first_timeout
+    Player.MAX_ELEMENTARY_OPERATIONS_TIMEOUT = timeout
+    random.seed(seed)
+
+    referee = referee_class()
+    # Only the scores are read, the shapes of the game need not be animated
+    referee.gui_enabled = False
+    referee.play(scripts)
+    scores_of_battle = []
+    for name in scripts:
+        player = referee.get_player_by_name(name)
+        scores_of_battle.append(player.score if not player.has_lost else None)
+    # The ranks are computed here so that the main process only has to count them
+    return tuple(scores_of_battle), tuple(_get_ranks(scores_of_battle))
+
+
+def _get_ranks(scores_of_battle):
+    """
+    Compute the rank of every player of a battle with a single sort. The players with the same score share the best
+    of their ranks, and the players who lost are ranked after all the others.
+
+    :param scores_of_battle: the list containing, for each player, her score or None if she lost.
+    :return: the list containing, for each player, her rank (starting from 0).
+    """
+    keys = [-x if x is not None else float('inf') for x in scores_of_battle]
+    ranks = [0] * len(keys)
+    previous = None
+    for rank, player in enumerate(sorted(range(len(keys)), key=keys.__getitem__)):
+        # A player with the same score as the previous one gets the same rank
+        ranks[player] = ranks[previous] if rank > 0 and keys[player] == keys[previous] else rank
+        previous = player
+    return ranks
 
 
 def local_battle(referee):
@@ -33,35 +134,7 @@ def local_battle(referee):
     """
 
     # Parse input parameters
-
-    parser = ArgumentParser(referee.get_name(),
-                            description="""
-Tool for testing bots for the game %s
-Author:  %s
-
-Should be run in a folder containing :
-- an html folder
-""" % (referee.get_name(), referee.get_author()),
-                            epilog="""
-EXAMPLE
-=======
-python3 %s.py ./localIAs/ai1.sync /home/.../myai.sync
-runs a battle with the bots from the two selected files  
-
-OUTPUT
-======
-If the -s option is given, print some statistics on the console. 
-Otherwise, produce a json file and save it to the file ./html/results.json. 
-The file contains the necessary information to display the battle. It can then be read 
-using the PHP script ./html/index.php. 
-
-To do so, you can use the php server software of your choice. On most of the linux 
-distribution, the simplest way consists in using the php -S command:
-> cd html
-> php -S localhost:8888
-> firefox index.php 
-""" % referee.get_filename(),
-                            formatter_class=RawTextHelpFormatter)
+    parser = _LocalBattleArgumentParser(referee)
 
     parser.add_argument('-lo', '--log-output', action='store_true',
                         help='Any string printed by a player is logged and displayed on the console.')
@@ -97,12 +170,22 @@ distribution, the simplest way consists in using the php -S command:
     parser.add_argument('sync_files', nargs='+')
     args = parser.parse_args()
 
-    # Set logs according to input parameters
-    logs.LOG_OUTPUT = (args.log_output or args.log_all) and args.stats is None
-    logs.LOG_INPUT = (args.log_input or args.log_all) and args.stats is None
-    logs.LOG_DEBUG = (args.log_debug or args.log_all) and args.stats is None
-    logs.LOG_RESULTS = (args.log_results or args.log_all) and args.stats is None
-    logs.LOG_GAME = (args.log_game or args.log_all) and args.stats is None
+    # Check input files
+    allowed_number_of_players = referee.allowed_number_of_players()
+    if len(args.sync_files) not in allowed_number_of_players:
+        print('Incorrect numbers of files. Allowed number of players:',
+              ' '.join([str(x) for x in allowed_number_of_players]))
+        return
+
+    # Set logs according to input parameters (no log is displayed if -s is given)
+    if args.stats is None:
+        logs.LOG_OUTPUT = args.log_output or args.log_all
+        logs.LOG_INPUT = args.log_input or args.log_all
+        logs.LOG_DEBUG = args.log_debug or args.log_all
+        logs.LOG_RESULTS = args.log_results or args.log_all
+        logs.LOG_GAME = args.log_game or args.log_all
+    else:
+        logs.LOG_OUTPUT = logs.LOG_INPUT = logs.LOG_DEBUG = logs.LOG_RESULTS = logs.LOG_GAME = False
 
     # Set timeouts according to input parameters
     if args.first_timeout is not None:
@@ -112,72 +195,98 @@ distribution, the simplest way consists in using the php -S command:
     if args.seed is not None:
         random.seed(args.seed)
 
-    # Check input files
-    if len(args.sync_files) not in referee.allowed_number_of_players():
-        print('Incorrect numbers of files. Allowed number of players:',
-              ' '.join([str(x) for x in referee.allowed_number_of_players()]))
-        return
-
     def get_name(filename):
         return splitext(basename(filename))[0]
 
     # Set scripts of players according to input files
+    # (the second player with the same file name is suffixed with _2, the third one with _3, ...)
     scripts = dict()
+    nb_occurrences = Counter()
     for script in args.sync_files:
         script_name = get_name(script)
-        name = script_name
-        for i in count():
-            if name in scripts:
-                name = script_name + '_' + str(i + 2)
-                continue
-            break
+        nb_occurrences[script_name] += 1
+        name = script_name if nb_occurrences[script_name] == 1 else script_name + '_' + str(nb_occurrences[script_name])
+        while name in scripts:
+            # The suffixed name is already the name of another file (e.g. files a, a and a_2)
+            nb_occurrences[script_name] += 1
+            name = script_name + '_' + str(nb_occurrences[script_name])
         scripts[name] = script
 
     # Play according to input parameters
     if args.stats is None:
         referee.play(scripts)
-        referee.write_results_to(OUTPUT_DIRECTORY + OUTPUT_FILENAME)
+        referee.write_results_to(OUTPUT_PATH)
     else:
-        # User asks for statistics
+        # User asks for statistics (the process pool is only needed here, so it is not imported for a single battle)
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from concurrent.futures.process import BrokenProcessPool
+        import os
+
         nb_battles = args.stats
-        scores = []
         names = list(scripts.keys())
-        # Play all the battles
-        for i in range(nb_battles):
-            print('Run battle', i + 1, '/', nb_battles, end='\r')
-            referee.play(scripts)
-            scores_of_battle = []
-            for name in names:
-                player = referee.get_player_by_name(name)
-                scores_of_battle.append(player.score if not player.has_lost else None)
-            scores.append(scores_of_battle)
+
+        # The statistics are accumulated as soon as a battle is over, so that the scores of all the battles are not
+        # kept in memory. For each player: the number of battles she lost, the sum of her scores on the other battles
+        # and, for each possible rank, the number of battles where she had the given rank.
+        nb_battles_done = 0
+        last_progress_time = 0
+        nb_losses = [0] * len(names)
+        sums_of_scores = [0] * len(names)
+        frequencies = [[0] * len(names) for _ in names]
+
+        def add_battle(scores_of_battle, ranks_of_battle):
+            nonlocal nb_battles_done, last_progress_time
+            for i, (score, rank) in enumerate(zip(scores_of_battle, ranks_of_battle)):
+                if score is None:
+                    nb_losses[i] += 1
+                else:
+                    sums_of_scores[i] += score
+                frequencies[i][rank] += 1
+            nb_battles_done += 1
+
+            # Display the progress, but not after each battle if the battles are very short
+            now = time.monotonic()
+            if nb_battles_done == nb_battles or now - last_progress_time >= PROGRESS_PERIOD:
+                sys.stdout.write('Run battle %d / %d\r' % (nb_battles_done, nb_battles))
+                sys.stdout.flush()
+                last_progress_time = now
+
+        # Play all the battles, in parallel, each battle is seeded with its own seed (derived from the seed of the
+        # referee) so that the results are reproducible. The results are aggregated as soon as each battle is over,
+        # whatever the order in which the battles were submitted.
+        seed = random.getrandbits(32)
+        battles = {i: (type(referee), scripts, seed + i, Player.FIRST_MAX_ELEMENTARY_OPERATIONS_TIMEOUT,
+                       Player.MAX_ELEMENTARY_OPERATIONS_TIMEOUT) for i in range(nb_battles)}
+        try:
+            with ProcessPoolExecutor(os.cpu_count()) as executor:
+                futures = {executor.submit(_run_one_battle, battle): i for i, battle in battles.items()}
+                for future in as_completed(futures):
+                    add_battle(*future.result())
+                    del battles[futures[future]]
+        except (BrokenProcessPool, OSError, NotImplementedError):
+            # The pool cannot be used, e.g. the workers cannot import the main script (it is not protected by
+            # if __name__ == '__main__' and the processes are spawned) or the platform does not support it. The
+            # battles that are not over are then played one after the other in this process.
+            pass
+        for battle in battles.values():
+            add_battle(*_run_one_battle(battle))
 
         for i, name in enumerate(names):
             # For each player
 
-            # Count the number of times the player did not reach the end of the game
-            nb_loss = sum(1 if scores_of_battle[i] is None else 0 for scores_of_battle in scores)
-
-            # Count the average score of the player on the non-loss battles
-            if nb_loss == len(scores):
+            # Count the average score of the player, the lost battles count for 0 (the sum of the scores of the
+            # non-loss battles is divided by the number of all the battles)
+            if nb_losses[i] == nb_battles:
                 avg_score = 'N/A'
             else:
-                avg_score = '%.3f' % (sum(scores_of_battle[i] for scores_of_battle in scores
-                                if scores_of_battle[i] is not None) / len(scores))
-
-            # For each possible rank of the player, count the number of battles where she had the given rank.
-            frequencies = [0] * len(names)
-            for scores_of_battle in scores:
-                scores_of_battle_no_none = [-x if x is not None else float('inf') for x in scores_of_battle]
-                rank = sorted(scores_of_battle_no_none).index(scores_of_battle_no_none[i])
-                frequencies[rank] += 1
+                avg_score = '%.3f' % (sums_of_scores[i] / nb_battles)
 
             # Print the results
             print()
             print('Results for Player', name)
-            print('Number of battles', len(scores))
-            print('Battles without error:', len(scores) - nb_loss)
+            print('Number of battles', nb_battles)
+            print('Battles without error:', nb_battles - nb_losses[i])
             print('Average score:', avg_score)
             print('Ranking:')
-            for i, f in enumerate(frequencies):
-                print('Rank', i + 1, ':', f)
+            for rank, f in enumerate(frequencies[i]):
+                print('Rank', rank + 1, ':', f)
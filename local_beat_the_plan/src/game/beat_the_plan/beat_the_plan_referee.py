@@ -2,6 +2,8 @@ import random
 
 from src.referee.referee import Referee, Player
 from src.gui.shapes import *
+from itertools import combinations
+from collections import defaultdict
 import math
 
 # Constants
@@ -17,8 +19,44 @@ ELECTRICITY_ZONE_TYPE = 3
 DURATIONS = [11, 6, 4, 3, 2, 2, 2, 1, 1]
 # For each duration d, DURATIONS[d - 1] is the number of jobs with that duration
 
+# Durations of all the jobs of a construction site, before they are shuffled
+DURATIONS_POOL = tuple(d for d in range(1, len(DURATIONS) + 1) for _ in range(DURATIONS[d - 1]))
+
 FIRST_JOB = 0
 SECOND_JOB = 1
+JOBS = (FIRST_JOB, SECOND_JOB)
+
+# Second input of a turn where no job starts or ends, encoded once for all the games
+NO_STARTING_OR_ENDING_JOB_MSG = Player.encode_input_lines([[0, 0]])
+
+
+def _get_electricity_placements():
+    """
+    :return: the list of all the possible placements of the GRID_SIZE electricity zones of a construction site, such
+    that no two electricity zones are neighbors. Each placement is a tuple of the (increasing) indexes
+    row * GRID_SIZE + column of the zones.
+    """
+    def are_neighbors(index1, index2):
+        row1, column1 = divmod(index1, GRID_SIZE)
+        row2, column2 = divmod(index2, GRID_SIZE)
+        return abs(row1 - row2) + abs(column1 - column2) == 1
+
+    return [indexes for indexes in combinations(range(GRID_SIZE * GRID_SIZE), GRID_SIZE)
+            if not any(are_neighbors(index1, index2) for index1, index2 in combinations(indexes, 2))]
+
+
+ELECTRICITY_PLACEMENTS = _get_electricity_placements()
+
+# For each zone index row * GRID_SIZE + column, the indexes of the neighbor zones (up, down, left and right)
+NEIGHBOR_INDEXES = tuple(
+    tuple(neighbor_row * GRID_SIZE + neighbor_column
+          for neighbor_row, neighbor_column in [(row - 1, column), (row + 1, column),
+                                                (row, column - 1), (row, column + 1)]
+          if 0 <= neighbor_row < GRID_SIZE and 0 <= neighbor_column < GRID_SIZE)
+    for row in range(GRID_SIZE) for column in range(GRID_SIZE))
+
+# Mask of a construction site whose zones are all finished (the zone of index i is the i-th bit of the mask)
+ALL_ZONES_FINISHED_MASK = (1 << (GRID_SIZE * GRID_SIZE)) - 1
 
 WIN_SCORE = GRID_SIZE * GRID_SIZE
 
@@ -95,27 +133,56 @@ JOB_DISAPPEAR_UPDATE_TIME = 0.9
 JOB_INCREASE_DURATION_SAVE_TIME = 0.8
 JOB_INCREASE_DURATION_UPDATE_TIME = 0.9
 
+# Icons constants
+ICON_ARC_RADIUS = CELL_WIDTH // 10
+
+# Lengths of the rays of the sun and of the lines of the ice of the isolation icon
+SUN_RAY_START = 1.5 * CELL_WIDTH // 7
+SUN_RAY_END = 3 * CELL_WIDTH // 7
+ICE_SHORT_LINE = 1.5 * CELL_WIDTH // 7
+ICE_LONG_LINE = 3 * CELL_WIDTH // 7
+ICE_BRANCH_LINE = 1.2 * CELL_WIDTH // 7
+# (the floor division is not symmetric, -1.25 * CELL_WIDTH // 7 is not the opposite of 1.25 * CELL_WIDTH // 7)
+ICE_SHORT_LINE_START = 1.25 * CELL_WIDTH // 7
+ICE_SHORT_LINE_START_NEG = -1.25 * CELL_WIDTH // 7
+
+# Sizes of the heads of the workers, and coordinates of the right and left eyes (the smile is drawn between the
+# symmetric of the eyes)
+WORKER_HEAD_RADIUS = CELL_WIDTH // 4
+WORKER_EYE_RADIUS = CELL_WIDTH // 16
+WORKER_SMILE_RADIUS = CELL_WIDTH // 8
+WORKER_RIGHT_EYE_X = CELL_WIDTH // 8 * math.cos(math.pi / 4)
+WORKER_RIGHT_EYE_Y = -CELL_WIDTH // 8 * math.sin(math.pi / 4)
+WORKER_LEFT_EYE_X = CELL_WIDTH // 8 * math.cos(3 * math.pi / 4)
+WORKER_LEFT_EYE_Y = -CELL_WIDTH // 8 * math.sin(3 * math.pi / 4)
+WORKER_SMILE_RIGHT_Y = CELL_WIDTH // 8 * math.sin(math.pi / 4)
+WORKER_SMILE_LEFT_Y = CELL_WIDTH // 8 * math.sin(3 * math.pi / 4)
+
+# Cosine and sine of the directions of the eyelashes of the workerwoman
+EYELASHES_DIRECTIONS = [(math.cos(2 * math.pi / 3 - i * math.pi / 6), math.sin(2 * math.pi / 3 - i * math.pi / 6))
+                        for i in range(3)]
+
 
 def get_painting_shape():
     path = Path("painting-icon", 0, CELL_WIDTH * 3 // 7)
-    path.add_arc_element(True, CELL_WIDTH // 10, CELL_WIDTH // 10, 90,
+    path.add_arc_element(True, ICON_ARC_RADIUS, ICON_ARC_RADIUS, 90,
                          False, True, -CELL_WIDTH * 0.5 // 7, CELL_WIDTH * 2.5 // 7)
     path.add_line_element(True, -CELL_WIDTH * 0.5 // 7, 0)
-    path.add_arc_element(True, CELL_WIDTH // 10, CELL_WIDTH // 10, 90,
+    path.add_arc_element(True, ICON_ARC_RADIUS, ICON_ARC_RADIUS, 90,
                          False, False, -CELL_WIDTH * 1 // 7, -CELL_WIDTH * 0.5 // 7)
     path.add_line_element(True, -CELL_WIDTH * 1.75 // 7, -CELL_WIDTH * 0.5 // 7)
-    path.add_arc_element(True, CELL_WIDTH // 10, CELL_WIDTH // 10, 90,
+    path.add_arc_element(True, ICON_ARC_RADIUS, ICON_ARC_RADIUS, 90,
                          False, True, -CELL_WIDTH * 2 // 7, -CELL_WIDTH * 1 // 7)
     path.add_line_element(True, -CELL_WIDTH * 2 // 7, -CELL_WIDTH * 3 // 7)
     path.add_line_element(True, CELL_WIDTH * 2 // 7, -CELL_WIDTH * 3 // 7)
     path.add_move_element(True, 0, CELL_WIDTH * 3 // 7)
-    path.add_arc_element(True, CELL_WIDTH // 10, CELL_WIDTH // 10, 90,
+    path.add_arc_element(True, ICON_ARC_RADIUS, ICON_ARC_RADIUS, 90,
                          False, False, CELL_WIDTH * 0.5 // 7, CELL_WIDTH * 2.5 // 7)
     path.add_line_element(True, CELL_WIDTH * 0.5 // 7, 0)
-    path.add_arc_element(True, CELL_WIDTH // 10, CELL_WIDTH // 10, 90,
+    path.add_arc_element(True, ICON_ARC_RADIUS, ICON_ARC_RADIUS, 90,
                          False, True, CELL_WIDTH * 1 // 7, -CELL_WIDTH * 0.5 // 7)
     path.add_line_element(True, CELL_WIDTH * 1.75 // 7, -CELL_WIDTH * 0.5 // 7)
-    path.add_arc_element(True, CELL_WIDTH // 10, CELL_WIDTH // 10, 90,
+    path.add_arc_element(True, ICON_ARC_RADIUS, ICON_ARC_RADIUS, 90,
                          False, False, CELL_WIDTH * 2 // 7, -CELL_WIDTH * 1 // 7)
     path.add_line_element(True, CELL_WIDTH * 2 // 7, -CELL_WIDTH * 3 // 7)
 
@@ -142,10 +209,11 @@ def get_isolation_shape():
     delta = -math.pi / 6
     for i in range(5):
         alpha = alpha0 + i * delta
-        x1 = 1.5 * CELL_WIDTH // 7 * math.cos(alpha)
-        y1 = 1.5 * CELL_WIDTH // 7 * math.sin(alpha)
-        x2 = 3 * CELL_WIDTH // 7 * math.cos(alpha)
-        y2 = 3 * CELL_WIDTH // 7 * math.sin(alpha)
+        cos_alpha, sin_alpha = math.cos(alpha), math.sin(alpha)
+        x1 = SUN_RAY_START * cos_alpha
+        y1 = SUN_RAY_START * sin_alpha
+        x2 = SUN_RAY_END * cos_alpha
+        y2 = SUN_RAY_END * sin_alpha
         gsun.add_child(Line('isolation-icon-sun-line', x1, y1, x2, y2))
 
     gsun.fill_color = (255, 255, 0)
@@ -155,53 +223,53 @@ def get_isolation_shape():
     g.add_child(gice)
 
     ice_alpha = math.pi / 2
-    x1 = 1.25 * CELL_WIDTH // 7
-    y1 = 1.25 * CELL_WIDTH // 7
-    x2 = x1 + 1.5 * CELL_WIDTH // 7 * math.cos(ice_alpha - 0.1)
-    y2 = y1 + 1.5 * CELL_WIDTH // 7 * math.sin(ice_alpha - 0.1)
+    x1 = ICE_SHORT_LINE_START
+    y1 = ICE_SHORT_LINE_START
+    x2 = x1 + ICE_SHORT_LINE * math.cos(ice_alpha - 0.1)
+    y2 = y1 + ICE_SHORT_LINE * math.sin(ice_alpha - 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     x1 = 0
     y1 = 0
-    x2 = x1 + 3 * CELL_WIDTH // 7 * math.cos(ice_alpha + 0.1)
-    y2 = y1 + 3 * CELL_WIDTH // 7 * math.sin(ice_alpha + 0.1)
+    x2 = x1 + ICE_LONG_LINE * math.cos(ice_alpha + 0.1)
+    y2 = y1 + ICE_LONG_LINE * math.sin(ice_alpha + 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     ice_alpha = math.pi / 2 + math.pi / 3
     x1 = (x1 * 0.45 + x2 * 0.55)
     y1 = (y1 * 0.45 + y2 * 0.55)
-    x2 = x1 + 1.2 * CELL_WIDTH // 7 * math.cos(ice_alpha + 0.1)
-    y2 = y1 + 1.2 * CELL_WIDTH // 7 * math.sin(ice_alpha + 0.1)
+    x2 = x1 + ICE_BRANCH_LINE * math.cos(ice_alpha + 0.1)
+    y2 = y1 + ICE_BRANCH_LINE * math.sin(ice_alpha + 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     ice_alpha = math.pi / 2 - math.pi / 3
-    x2 = x1 + 1.2 * CELL_WIDTH // 7 * math.cos(ice_alpha + 0.1)
-    y2 = y1 + 1.2 * CELL_WIDTH // 7 * math.sin(ice_alpha + 0.1)
+    x2 = x1 + ICE_BRANCH_LINE * math.cos(ice_alpha + 0.1)
+    y2 = y1 + ICE_BRANCH_LINE * math.sin(ice_alpha + 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     ice_alpha = math.pi
-    x1 = -1.25 * CELL_WIDTH // 7
-    y1 = -1.25 * CELL_WIDTH // 7
-    x2 = x1 + 1.5 * CELL_WIDTH // 7 * math.cos(ice_alpha + 0.1)
-    y2 = y1 + 1.5 * CELL_WIDTH // 7 * math.sin(ice_alpha + 0.1)
+    x1 = ICE_SHORT_LINE_START_NEG
+    y1 = ICE_SHORT_LINE_START_NEG
+    x2 = x1 + ICE_SHORT_LINE * math.cos(ice_alpha + 0.1)
+    y2 = y1 + ICE_SHORT_LINE * math.sin(ice_alpha + 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     x1 = 0
     y1 = 0
-    x2 = x1 + 3 * CELL_WIDTH // 7 * math.cos(ice_alpha - 0.1)
-    y2 = y1 + 3 * CELL_WIDTH // 7 * math.sin(ice_alpha - 0.1)
+    x2 = x1 + ICE_LONG_LINE * math.cos(ice_alpha - 0.1)
+    y2 = y1 + ICE_LONG_LINE * math.sin(ice_alpha - 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     ice_alpha = math.pi + math.pi / 3
     x1 = (x1 * 0.45 + x2 * 0.55)
     y1 = (y1 * 0.45 + y2 * 0.55)
-    x2 = x1 + 1.2 * CELL_WIDTH // 7 * math.cos(ice_alpha + 0.1)
-    y2 = y1 + 1.2 * CELL_WIDTH // 7 * math.sin(ice_alpha + 0.1)
+    x2 = x1 + ICE_BRANCH_LINE * math.cos(ice_alpha + 0.1)
+    y2 = y1 + ICE_BRANCH_LINE * math.sin(ice_alpha + 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     ice_alpha = math.pi - math.pi / 3
-    x2 = x1 + 1.2 * CELL_WIDTH // 7 * math.cos(ice_alpha + 0.1)
-    y2 = y1 + 1.2 * CELL_WIDTH // 7 * math.sin(ice_alpha + 0.1)
+    x2 = x1 + ICE_BRANCH_LINE * math.cos(ice_alpha + 0.1)
+    y2 = y1 + ICE_BRANCH_LINE * math.sin(ice_alpha + 0.1)
     gice.add_child(Line('isolation-icon-ice-line', x1, y1, x2, y2))
 
     gice.stroke_color = (100, 100, 255)
@@ -255,51 +323,52 @@ def get_electricity_shape():
 
 def get_workerwoman_shape():
     group = Group("workerwoman")
-    group.add_child(Oval("workerwoman-head", 0, 0, CELL_WIDTH // 4, CELL_WIDTH // 4))
-    group.add_child(Oval("workerwoman-head-eye", CELL_WIDTH // 8 * math.cos(math.pi / 4),
-                         -CELL_WIDTH // 8 * math.sin(math.pi / 4), CELL_WIDTH // 16, CELL_WIDTH // 16))
-    group.add_child(Oval("workerwoman-head-eye", CELL_WIDTH // 8 * math.cos(3 * math.pi / 4),
-                         -CELL_WIDTH // 8 * math.sin(3 * math.pi / 4), CELL_WIDTH // 16, CELL_WIDTH // 16))
-
-    for i in range(3):
-        x1 = CELL_WIDTH // 8 * math.cos(3 * math.pi / 4) + CELL_WIDTH // 16 * math.cos(
-            2 * math.pi / 3 - i * math.pi / 6)
-        y1 = -CELL_WIDTH // 8 * math.sin(3 * math.pi / 4) - CELL_WIDTH // 16 * math.sin(
-            2 * math.pi / 3 - i * math.pi / 6)
-        x2 = x1 + CELL_WIDTH // 16 * math.cos(2 * math.pi / 3 - i * math.pi / 6)
-        y2 = y1 - CELL_WIDTH // 16 * math.sin(2 * math.pi / 3 - i * math.pi / 6)
+    group.add_child(Oval("workerwoman-head", 0, 0, WORKER_HEAD_RADIUS, WORKER_HEAD_RADIUS))
+    group.add_child(Oval("workerwoman-head-eye", WORKER_RIGHT_EYE_X, WORKER_RIGHT_EYE_Y,
+                         WORKER_EYE_RADIUS, WORKER_EYE_RADIUS))
+    group.add_child(Oval("workerwoman-head-eye", WORKER_LEFT_EYE_X, WORKER_LEFT_EYE_Y,
+                         WORKER_EYE_RADIUS, WORKER_EYE_RADIUS))
+
+    for cos_direction, sin_direction in EYELASHES_DIRECTIONS:
+        x1 = WORKER_LEFT_EYE_X + WORKER_EYE_RADIUS * cos_direction
+        y1 = WORKER_LEFT_EYE_Y - WORKER_EYE_RADIUS * sin_direction
+        x2 = x1 + WORKER_EYE_RADIUS * cos_direction
+        y2 = y1 - WORKER_EYE_RADIUS * sin_direction
         group.add_child(Line("workerwoman-head-eye", x1, y1, x2, y2))
 
-        x1 = CELL_WIDTH // 8 * math.cos(math.pi / 4) + CELL_WIDTH // 16 * math.cos(2 * math.pi / 3 - i * math.pi / 6)
-        y1 = -CELL_WIDTH // 8 * math.sin(math.pi / 4) - CELL_WIDTH // 16 * math.sin(2 * math.pi / 3 - i * math.pi / 6)
-        x2 = x1 + CELL_WIDTH // 16 * math.cos(2 * math.pi / 3 - i * math.pi / 6)
-        y2 = y1 - CELL_WIDTH // 16 * math.sin(2 * math.pi / 3 - i * math.pi / 6)
+        x1 = WORKER_RIGHT_EYE_X + WORKER_EYE_RADIUS * cos_direction
+        y1 = WORKER_RIGHT_EYE_Y - WORKER_EYE_RADIUS * sin_direction
+        x2 = x1 + WORKER_EYE_RADIUS * cos_direction
+        y2 = y1 - WORKER_EYE_RADIUS * sin_direction
         group.add_child(Line("workerwoman-head-eye", x1, y1, x2, y2))
 
-    path = Path("workerwoman-head-smile",
-                CELL_WIDTH // 8 * math.cos(math.pi / 4), CELL_WIDTH // 8 * math.sin(math.pi / 4))
-    path.add_arc_element(True, CELL_WIDTH // 8, CELL_WIDTH // 8, math.pi / 2, False, True,
-                         CELL_WIDTH // 8 * math.cos(3 * math.pi / 4), CELL_WIDTH // 8 * math.sin(3 * math.pi / 4))
+    path = Path("workerwoman-head-smile", WORKER_RIGHT_EYE_X, WORKER_SMILE_RIGHT_Y)
+    path.add_arc_element(True, WORKER_SMILE_RADIUS, WORKER_SMILE_RADIUS, math.pi / 2, False, True,
+                         WORKER_LEFT_EYE_X, WORKER_SMILE_LEFT_Y)
     group.add_child(path)
     return group
 
 
 def get_workerman_shape():
     group = Group("workerman")
-    group.add_child(Oval("workerman-head", 0, 0, CELL_WIDTH // 4, CELL_WIDTH // 4))
-    group.add_child(Oval("workerman-head-eye", CELL_WIDTH // 8 * math.cos(math.pi / 4),
-                         -CELL_WIDTH // 8 * math.sin(math.pi / 4), CELL_WIDTH // 16, CELL_WIDTH // 16))
-    group.add_child(Oval("workerman-head-eye", CELL_WIDTH // 8 * math.cos(3 * math.pi / 4),
-                         -CELL_WIDTH // 8 * math.sin(3 * math.pi / 4), CELL_WIDTH // 16, CELL_WIDTH // 16))
-
-    path = Path("workerman-head-smile",
-                CELL_WIDTH // 8 * math.cos(math.pi / 4), CELL_WIDTH // 8 * math.sin(math.pi / 4))
-    path.add_arc_element(True, CELL_WIDTH // 8, CELL_WIDTH // 8, math.pi / 2, False, True,
-                         CELL_WIDTH // 8 * math.cos(3 * math.pi / 4), CELL_WIDTH // 8 * math.sin(3 * math.pi / 4))
+    group.add_child(Oval("workerman-head", 0, 0, WORKER_HEAD_RADIUS, WORKER_HEAD_RADIUS))
+    group.add_child(Oval("workerman-head-eye", WORKER_RIGHT_EYE_X, WORKER_RIGHT_EYE_Y,
+                         WORKER_EYE_RADIUS, WORKER_EYE_RADIUS))
+    group.add_child(Oval("workerman-head-eye", WORKER_LEFT_EYE_X, WORKER_LEFT_EYE_Y,
+                         WORKER_EYE_RADIUS, WORKER_EYE_RADIUS))
+
+    path = Path("workerman-head-smile", WORKER_RIGHT_EYE_X, WORKER_SMILE_RIGHT_Y)
+    path.add_arc_element(True, WORKER_SMILE_RADIUS, WORKER_SMILE_RADIUS, math.pi / 2, False, True,
+                         WORKER_LEFT_EYE_X, WORKER_SMILE_LEFT_Y)
     group.add_child(path)
     return group
 
 
+# Icon of each type of zone, indexed by the type. The icons are built once, each zone of each player displays a copy of
+# the icon of its type.
+ZONES_ICONS = (get_painting_shape(), get_isolation_shape(), get_plumbing_shape(), get_electricity_shape())
+
+
 class GuiManager:
     _inst = None
 
@@ -311,36 +380,39 @@ class GuiManager:
         self._referee = referee
         GuiManager._inst = self
 
-        self._players_colors = dict()
-        self._players_scores_texts = dict()
-
-        self._players_workers_pauses_zones = dict()
-        self._players_left_grids = dict()
-        self._players_top_grids = dict()
+        # Colors, texts of the scores, pauses zones, coordinates of the grids and workers of the players, indexed by
+        # the id of the player (the lists are allocated by clear, when the players are known)
+        self._players_colors = []
+        self._players_scores_texts = []
 
-        self._players_working_jobs_sliders = []
-        self._players_working_jobs_rectangles = []
+        self._players_workers_pauses_zones = []
+        self._players_left_grids = []
+        self._players_top_grids = []
 
-        self._zones_durations_texts = []
+        # Sliders, rectangles and texts of the durations of the jobs, indexed by (index of the zone, player, job)
+        self._players_working_jobs_sliders = dict()
+        self._players_working_jobs_rectangles = dict()
+        self._zones_durations_texts = dict()
 
-        self._players_workers = dict()
+        self._players_workers = []
 
     def clear(self):
-        self._players_colors.clear()
-        self._players_scores_texts.clear()
-        self._players_workers_pauses_zones.clear()
-        self._players_left_grids.clear()
-        self._players_top_grids.clear()
+        nb_players = len(self._referee.players)
+        self._players_colors = [None] * nb_players
+        self._players_scores_texts = [None] * nb_players
+        self._players_workers_pauses_zones = [None] * nb_players
+        self._players_left_grids = [None] * nb_players
+        self._players_top_grids = [None] * nb_players
         self._players_working_jobs_sliders.clear()
         self._players_working_jobs_rectangles.clear()
-        self._players_workers.clear()
-        del self._zones_durations_texts[:]
+        self._players_workers = [None] * nb_players
+        self._zones_durations_texts.clear()
 
     def _get_cell_x_center(self, player, x):
-        return self._players_left_grids[player] + CELL_WIDTH / 2 + x * CELL_WIDTH
+        return self._players_left_grids[player.id] + CELL_WIDTH / 2 + x * CELL_WIDTH
 
     def _get_cell_y_center(self, player, y):
-        return self._players_top_grids[player] + CELL_WIDTH / 2 + y * CELL_WIDTH
+        return self._players_top_grids[player.id] + CELL_WIDTH / 2 + y * CELL_WIDTH
 
     def _build_grid_lines(self):
 
@@ -348,8 +420,8 @@ class GuiManager:
             x0 = LEFT_GRID + (i % 2) * (GRID_WIDTH + GRID_MARGIN)
             y0 = TOP_GRID + (i // 2) * (GRID_WIDTH + GRID_MARGIN)
 
-            self._players_left_grids[player] = x0
-            self._players_top_grids[player] = y0
+            self._players_left_grids[player.id] = x0
+            self._players_top_grids[player.id] = y0
 
             for index in range(GRID_SIZE + 1):
                 x = self._get_cell_x_center(player, index) - CELL_WIDTH // 2
@@ -391,95 +463,82 @@ class GuiManager:
         self._build_players_names()
 
     def build_construction_sites(self, construction_site):
-        for row in range(GRID_SIZE):
-            self._zones_durations_texts.append([])
-            self._players_working_jobs_sliders.append([])
-            self._players_working_jobs_rectangles.append([])
-            for column in range(GRID_SIZE):
-                zone = construction_site.zones[row][column]
-                d1 = zone.get_duration(FIRST_JOB)
-                d2 = zone.get_duration(SECOND_JOB)
-                zones_durations_texts = dict()
-                players_working_jobs_sliders = dict()
-                players_working_jobs_rectangles = dict()
-                self._zones_durations_texts[-1].append(zones_durations_texts)
-                self._players_working_jobs_sliders[-1].append(players_working_jobs_sliders)
-                self._players_working_jobs_rectangles[-1].append(players_working_jobs_rectangles)
-                for player in self._referee.players:
-                    zonex = self._get_cell_x_center(player, column)
-                    zoney = self._get_cell_y_center(player, row)
-
-                    x = zonex + 3 * CELL_WIDTH // 8
-                    y1 = zoney - CELL_WIDTH // 4
-                    y2 = zoney + CELL_WIDTH // 4
-                    t1 = Text('zone-duration', x, y1, text=str(d1), font_size=15, font_family="Arial")
-                    t2 = Text('zone-duration', x, y2, text=str(d2), font_size=15, font_family="Arial")
-                    t1.stroke_color = (100, 100, 100)
-                    t2.stroke_color = (100, 100, 100)
-                    zones_durations_texts[player] = [t1, t2]
-                    self._referee.add_graphic(t1)
-                    self._referee.add_graphic(t2)
-
-                    x1 = zonex - CELL_WIDTH // 2
-                    y1 = zoney - CELL_WIDTH // 2
-                    y2 = zoney
-                    width = CELL_WIDTH
-                    height = CELL_WIDTH // 2
-
-                    r1 = Rectangle("job-rect", x1, y1, width, height)
-                    r2 = Rectangle("job-rect", x1, y2, width, height)
-                    r1.stroke_color = (255, 0, 0)
-                    r2.stroke_color = (255, 0, 0)
-                    r1.opacity = 0
-                    r2.opacity = 0
-                    r1.stroke_width = 5
-                    r2.stroke_width = 5
-
-                    players_working_jobs_rectangles[player] = [r1, r2]
-                    self._referee.add_graphic(r1)
-                    self._referee.add_graphic(r2)
-
-                    r1 = Rectangle("job-slider", 0, 0, width, height)
-                    r2 = Rectangle("job-slider", 0, 0, width, height)
-                    r1.translate_x = x1
-                    r1.translate_y = y1
-                    r2.translate_x = x1
-                    r2.translate_y = y2
-                    r1.fill_color = (0, 155, 0)
-                    r2.fill_color = (0, 155, 0)
-                    r1.scale_x = 0
-                    r2.scale_x = 0
-
-                    players_working_jobs_sliders[player] = [r1, r2]
-                    self._referee.add_graphic(r1)
-                    self._referee.add_graphic(r2)
-
-                    p = None
-                    if zone.type == PAINTING_ZONE_TYPE:
-                        p = get_painting_shape()
-                    elif zone.type == ISOLATION_ZONE_TYPE:
-                        p = get_isolation_shape()
-                    elif zone.type == PLUMBING_ZONE_TYPE:
-                        p = get_plumbing_shape()
-                    elif zone.type == ELECTRICITY_ZONE_TYPE:
-                        p = get_electricity_shape()
-
-                    if p is not None:
-                        p.opacity = 0.15
-                        p.translate_x = zonex
-                        p.translate_y = zoney
-                        self._referee.add_graphic(p)
+        # The shapes are added to the referee all at once, at the end
+        graphics = []
+        for index, zone in enumerate(construction_site.zones):
+            row, column = zone.row, zone.column
+            d1 = zone.get_duration(FIRST_JOB)
+            d2 = zone.get_duration(SECOND_JOB)
+            for player in self._referee.players:
+                zonex = self._get_cell_x_center(player, column)
+                zoney = self._get_cell_y_center(player, row)
+
+                x = zonex + 3 * CELL_WIDTH // 8
+                y1 = zoney - CELL_WIDTH // 4
+                y2 = zoney + CELL_WIDTH // 4
+                t1 = Text('zone-duration', x, y1, text=d1, font_size=15, font_family="Arial")
+                t2 = Text('zone-duration', x, y2, text=d2, font_size=15, font_family="Arial")
+                t1.stroke_color = (100, 100, 100)
+                t2.stroke_color = (100, 100, 100)
+                self._zones_durations_texts[index, player, FIRST_JOB] = t1
+                self._zones_durations_texts[index, player, SECOND_JOB] = t2
+                graphics.append(t1)
+                graphics.append(t2)
+
+                x1 = zonex - CELL_WIDTH // 2
+                y1 = zoney - CELL_WIDTH // 2
+                y2 = zoney
+                width = CELL_WIDTH
+                height = CELL_WIDTH // 2
+
+                r1 = Rectangle("job-rect", x1, y1, width, height)
+                r2 = Rectangle("job-rect", x1, y2, width, height)
+                r1.stroke_color = (255, 0, 0)
+                r2.stroke_color = (255, 0, 0)
+                r1.opacity = 0
+                r2.opacity = 0
+                r1.stroke_width = 5
+                r2.stroke_width = 5
+
+                self._players_working_jobs_rectangles[index, player, FIRST_JOB] = r1
+                self._players_working_jobs_rectangles[index, player, SECOND_JOB] = r2
+                graphics.append(r1)
+                graphics.append(r2)
+
+                r1 = Rectangle("job-slider", 0, 0, width, height)
+                r2 = Rectangle("job-slider", 0, 0, width, height)
+                r1.translate_x = x1
+                r1.translate_y = y1
+                r2.translate_x = x1
+                r2.translate_y = y2
+                r1.fill_color = (0, 155, 0)
+                r2.fill_color = (0, 155, 0)
+                r1.scale_x = 0
+                r2.scale_x = 0
+
+                self._players_working_jobs_sliders[index, player, FIRST_JOB] = r1
+                self._players_working_jobs_sliders[index, player, SECOND_JOB] = r2
+                graphics.append(r1)
+                graphics.append(r2)
+
+                p = ZONES_ICONS[zone.type].clone()
+                p.opacity = 0.15
+                p.translate_x = zonex
+                p.translate_y = zoney
+                graphics.append(p)
+
+        self._referee.add_graphics(graphics)
 
     def build_pauses_zones(self):
         for i, player in enumerate(self._referee.players):
-            x = self._players_left_grids[player] + (
+            x = self._players_left_grids[player.id] + (
                 (- CELL_WIDTH - GRID_MARGIN) if (i % 2 == 0) else (GRID_WIDTH + GRID_MARGIN))
-            y = self._players_top_grids[player] + CELL_WIDTH
+            y = self._players_top_grids[player.id] + CELL_WIDTH
             width = CELL_WIDTH
             height = 2 * CELL_WIDTH
 
             self._referee.add_graphic(Rectangle("pause-rect", x, y, width, height, rx=5, ry=5))
-            self._players_workers_pauses_zones[player] = (
+            self._players_workers_pauses_zones[player.id] = (
                 (x + CELL_WIDTH // 2, y + CELL_WIDTH // 2),
                 (x + CELL_WIDTH // 2, y + 3 * CELL_WIDTH // 2)
             )
@@ -487,8 +546,8 @@ class GuiManager:
     def add_workers(self, player):
         workerwoman = get_workerwoman_shape()
         workerman = get_workerman_shape()
-        self._players_workers[player] = [workerwoman, workerman]
-        for worker, coords in zip(self._players_workers[player], self._players_workers_pauses_zones[player]):
+        self._players_workers[player.id] = (workerwoman, workerman)
+        for worker, coords in zip(self._players_workers[player.id], self._players_workers_pauses_zones[player.id]):
             worker.translate_x, worker.translate_y = coords
         self._referee.add_graphic(workerman)
         self._referee.add_graphic(workerwoman)
@@ -498,39 +557,39 @@ class GuiManager:
             x = PLAYERS_NAME_RECT_LEFTS[i]
             y = PLAYERS_NAME_RECT_TOPS[i]
             t = Text('player-score', x + PLAYERS_NAME_WIDTH - PLAYERS_NAME_PADDING, y + PLAYERS_NAME_HEIGHT / 2,
-                     text='0', font_size=25, font_family="Arial")
+                     text=0, font_size=25, font_family="Arial")
 
             t.set_horizontal_right_align()
             t.set_vertical_center_align()
 
             self._referee.add_graphic(t)
-            self._players_scores_texts[player] = t
+            self._players_scores_texts[player.id] = t
 
     def edit_score(self, turn, player, score):
-        t = self._players_scores_texts[player]
+        t = self._players_scores_texts[player.id]
         t.save_state(turn + SCORES_SAVE_TIME)
-        t.text = str(score)
+        t.text = score
         t.save_state(turn + SCORES_UPDATE_TIME)
 
     def update_job_slider(self, turn, player, zone, job):
         duration = zone.get_duration(job)
-        r = self._players_working_jobs_sliders[zone.row][zone.column][player][job]
+        r = self._players_working_jobs_sliders[zone.index, player, job]
         r.save_state(turn + JOB_SLIDERS_SAVE_TIME)
         r.scale_x += 1 / duration
         r.save_state(turn + JOB_SLIDERS_UPDATE_TIME)
 
     def start_job(self, turn, player, zone, job, worker, starting):
-        r = self._players_working_jobs_rectangles[zone.row][zone.column][player][job]
+        r = self._players_working_jobs_rectangles[zone.index, player, job]
         r.save_state(turn + (JOB_APPEAR_SAVE_TIME if starting else JOB_DISAPPEAR_SAVE_TIME))
         r.stroke_opacity = 1 if starting else 0
         r.save_state(turn + (JOB_APPEAR_UPDATE_TIME if starting else JOB_DISAPPEAR_UPDATE_TIME))
 
         worker_index = 0 if worker.is_woman else 1
-        worker_shape = self._players_workers[player][worker_index]
+        worker_shape = self._players_workers[player.id][worker_index]
 
         worker_shape.save_state(turn + (JOB_APPEAR_SAVE_TIME if starting else JOB_DISAPPEAR_SAVE_TIME))
         if not starting:
-            worker_shape.translate_x, worker_shape.translate_y = self._players_workers_pauses_zones[player][
+            worker_shape.translate_x, worker_shape.translate_y = self._players_workers_pauses_zones[player.id][
                 worker_index]
         else:
             x = self._get_cell_x_center(player, zone.column)
@@ -541,30 +600,34 @@ class GuiManager:
     def increase_job_duration(self, turn, player, zone, job, ):
         duration = zone.get_duration(job)
 
-        t = self._zones_durations_texts[zone.row][zone.column][player][job]
+        t = self._zones_durations_texts[zone.index, player, job]
         t.save_state(turn + JOB_INCREASE_DURATION_SAVE_TIME)
-        t.text = str(duration)
+        t.text = duration
         t.save_state(turn + JOB_INCREASE_DURATION_UPDATE_TIME)
 
         if zone.is_started(job):
-            r = self._players_working_jobs_sliders[zone.row][zone.column][player][job]
+            r = self._players_working_jobs_sliders[zone.index, player, job]
             r.save_state(turn + JOB_INCREASE_DURATION_SAVE_TIME)
             r.scale_x = (turn - zone.start_turn(job) + 1) / duration
             r.save_state(turn + JOB_INCREASE_DURATION_UPDATE_TIME)
 
 
 class Worker:
+    __slots__ = ('current_working_zone', 'current_working_job', '_is_woman', 'busy_error_msg')
+
     def __init__(self, is_woman):
         self.current_working_zone = None
         self.current_working_job = None
         self._is_woman = is_woman
+        # Error message of a player asking this worker to work while it is already working
+        self.busy_error_msg = WORKER_WOMAN_ERROR if is_woman else WORKER_MAN_ERROR
 
     def work(self, zone, job):
         self.current_working_zone = zone
         self.current_working_job = job
 
     def stop_working(self):
-        self.current_working_job = None
+        self.current_working_zone = None
         self.current_working_job = None
 
     @property
@@ -577,6 +640,9 @@ class Worker:
 
 
 class Zone:
+    __slots__ = ('_type', '_row', '_column', '_durations', '_start_turns', '_last_turns', '_finished',
+                 '_nb_ended_jobs', '_constraint_checker')
+
     def __init__(self, row, column, type, duration1, duration2):
         self._type = type
         self._row = row
@@ -588,8 +654,16 @@ class Zone:
 
         self._durations = [duration1, duration2]
         self._start_turns = [None, None]
+        # Last turn of each job (start turn + duration - 1), None while the job is not started. It is updated when the
+        # job starts and when its duration increases.
+        self._last_turns = [None, None]
         self._finished = False
 
+        # Number of jobs marked as ended with the end method
+        self._nb_ended_jobs = 0
+
+        # Function checking the constraint of the type of this zone, see _CONSTRAINT_CHECKERS
+        self._constraint_checker = Zone._CONSTRAINT_CHECKERS[type]
 
     @property
     def row(self):
@@ -603,14 +677,24 @@ class Zone:
     def type(self):
         return self._type
 
+    @property
+    def index(self):
+        """
+        :return: the index of the zone in the zones of its construction site, that is row * GRID_SIZE + column
+        """
+        return self._row * GRID_SIZE + self._column
+
     def get_duration(self, job):
         return self._durations[job]
 
     def increase_duration(self, job):
         self._durations[job] += 1
+        if self._last_turns[job] is not None:
+            self._last_turns[job] += 1
 
     def start(self, job, turn):
         self._start_turns[job] = turn
+        self._last_turns[job] = turn + self._durations[job] - 1
 
     def is_started(self, job):
         return self._start_turns[job] is not None
@@ -619,9 +703,7 @@ class Zone:
         return self._start_turns[job]
 
     def last_turn(self, job):
-        if self._start_turns[job] is None:
-            return None
-        return self._start_turns[job] + self._durations[job] - 1
+        return self._last_turns[job]
 
     def is_ended(self, turn, job):
         return self.is_started(job) and self.last_turn(job) <= turn
@@ -629,6 +711,16 @@ class Zone:
     def is_all_jobs_ended(self, turn):
         return self.is_ended(turn, FIRST_JOB) and self.is_ended(turn, SECOND_JOB)
 
+    def end(self, job):
+        """
+        Mark the given job as ended, this method should be called once per job, at the last turn of the job.
+        :return: True if the two jobs of the zone are ended, the zone is then finished.
+        """
+        self._nb_ended_jobs += 1
+        if self._nb_ended_jobs == 2:
+            self._finished = True
+        return self._finished
+
     def is_finished_for_the_first_time(self, turn):
         if self._finished:
             return False
@@ -637,52 +729,79 @@ class Zone:
             return True
         return False
 
-    def check_constraint(self, turn, neighbor_zones):
-        if self._type == PAINTING_ZONE_TYPE:
-            if not self.is_started(SECOND_JOB):
-                return None
-            if self.is_started(FIRST_JOB) and self.start_turn(SECOND_JOB) > self.last_turn(FIRST_JOB):
-                return None
-            return PAINTING_JOB_ERROR % (self.row, self.column)
-
-        elif self._type == ISOLATION_ZONE_TYPE:
-            if not self.is_started(FIRST_JOB):
-                return None
-            if not self.is_started(SECOND_JOB):
-                return None
-            if self.start_turn(SECOND_JOB) > self.last_turn(FIRST_JOB):
-                return None
-            if self.start_turn(FIRST_JOB) > self.last_turn(SECOND_JOB):
-                return None
-            return ISOLATION_JOB_ERROR % (self.row, self.column)
-
-        elif self._type == PLUMBING_ZONE_TYPE:
-            if not self.is_started(SECOND_JOB) and not self.is_ended(turn, FIRST_JOB):
-                return None
-            if (self.is_started(FIRST_JOB) and self.is_started(SECOND_JOB)
-                    and self.start_turn(SECOND_JOB) >= self.start_turn(FIRST_JOB) and
-                    self.last_turn(SECOND_JOB) <= self.last_turn(FIRST_JOB)):
-                return None
-            return PLUMBING_JOB_ERROR % (self.row, self.column)
-
-        elif self._type == ELECTRICITY_ZONE_TYPE:
-            for zone in neighbor_zones:
-                if not zone.is_started(FIRST_JOB):
-                    continue
-                if self.is_started(FIRST_JOB) and self.start_turn(FIRST_JOB) <= zone.last_turn(FIRST_JOB):
-                    continue
-                return ELECTRICITY_FIRST_JOB_ERROR % (self.row, self.column)
-            for zone in neighbor_zones:
-                if not zone.is_started(SECOND_JOB):
-                    continue
-                if self.is_started(SECOND_JOB) and self.start_turn(SECOND_JOB) <= zone.start_turn(SECOND_JOB):
-                    continue
-                return ELECTRICITY_SECOND_JOB_ERROR % (self.row, self.column)
+    # The checkers read the start turns and the durations once instead of calling is_started, start_turn and
+    # last_turn. The last turn of a started job is start turn + duration - 1.
+
+    def _check_painting_constraint(self, turn, neighbor_zones):
+        start1, start2 = self._start_turns
+        if start2 is None:
+            return None
+        if start1 is not None and start2 > start1 + self._durations[FIRST_JOB] - 1:
+            return None
+        return PAINTING_JOB_ERROR % (self._row, self._column)
+
+    def _check_isolation_constraint(self, turn, neighbor_zones):
+        start1, start2 = self._start_turns
+        if start1 is None or start2 is None:
+            return None
+        duration1, duration2 = self._durations
+        if start2 > start1 + duration1 - 1 or start1 > start2 + duration2 - 1:
+            return None
+        return ISOLATION_JOB_ERROR % (self._row, self._column)
+
+    def _check_plumbing_constraint(self, turn, neighbor_zones):
+        start1, start2 = self._start_turns
+        duration1, duration2 = self._durations
+        if start2 is None and (start1 is None or start1 + duration1 - 1 > turn):
+            return None
+        if (start1 is not None and start2 is not None and start2 >= start1
+                and start2 + duration2 - 1 <= start1 + duration1 - 1):
+            return None
+        return PLUMBING_JOB_ERROR % (self._row, self._column)
+
+    def _check_electricity_constraint(self, turn, neighbor_zones):
+        start1, start2 = self._start_turns
+        for zone in neighbor_zones:
+            zone_start1 = zone._start_turns[FIRST_JOB]
+            if zone_start1 is None:
+                continue
+            if start1 is not None and start1 <= zone_start1 + zone._durations[FIRST_JOB] - 1:
+                continue
+            return ELECTRICITY_FIRST_JOB_ERROR % (self._row, self._column)
+        for zone in neighbor_zones:
+            zone_start2 = zone._start_turns[SECOND_JOB]
+            if zone_start2 is None:
+                continue
+            if start2 is not None and start2 <= zone_start2:
+                continue
+            return ELECTRICITY_SECOND_JOB_ERROR % (self._row, self._column)
         return None
 
+    # Function checking the constraint of each type of zone, indexed by the type
+    _CONSTRAINT_CHECKERS = (_check_painting_constraint, _check_isolation_constraint, _check_plumbing_constraint,
+                            _check_electricity_constraint)
+
+    def check_constraint(self, turn, neighbor_zones):
+        """
+        :param turn: the current turn
+        :param neighbor_zones: the zones next to this zone
+        :return: the error message if the jobs of this zone do not satisfy the constraint of the type of the zone and
+        None otherwise.
+        """
+        return self._constraint_checker(self, turn, neighbor_zones)
+
     def paste(self, zone):
+        """
+        Replace the type, the durations and the state of the jobs of this zone by those of the given zone.
+        :param zone: the copied zone
+        """
         self._type = zone._type
-        self._durations = [d for d in zone._durations]
+        self._durations = zone._durations[:]
+        self._start_turns = zone._start_turns[:]
+        self._last_turns = zone._last_turns[:]
+        self._finished = zone._finished
+        self._nb_ended_jobs = zone._nb_ended_jobs
+        self._constraint_checker = zone._constraint_checker
 
 
 class ConstructionSite:
@@ -691,36 +810,129 @@ class ConstructionSite:
     When initialized, the construction site is initialized at random.
     """
 
-    def __init__(self):
-        #  Partition of the 16 zones
-        types = [t for t in [PAINTING_ZONE_TYPE, ISOLATION_ZONE_TYPE, PLUMBING_ZONE_TYPE, ELECTRICITY_ZONE_TYPE]
-                 for _ in range(GRID_SIZE)]
-        while True:
+    def __init__(self, random_zones=True):
+        """
+        :param random_zones: if False, the types and the durations of the zones are not drawn at random, all the zones
+        are painting zones with jobs of duration 1. This is used to build a construction site whose zones are
+        immediately replaced, see copy.
+        """
+        if random_zones:
+            #  Partition of the 16 zones, no two electricity zones are neighbors: the electricity zones are placed
+            #  first and the other zones are shuffled in the remaining cells.
+            types = [t for t in (PAINTING_ZONE_TYPE, ISOLATION_ZONE_TYPE, PLUMBING_ZONE_TYPE) for _ in range(GRID_SIZE)]
             random.shuffle(types)
-            if any(types[row * GRID_SIZE + column] == ELECTRICITY_ZONE_TYPE
-                   and types[row * GRID_SIZE + column + 1] == ELECTRICITY_ZONE_TYPE
-                   for row in range(GRID_SIZE) for column in range(GRID_SIZE - 1)):
-                        continue
-            if any(types[row * GRID_SIZE + column] == ELECTRICITY_ZONE_TYPE
-                   and types[(row + 1) * GRID_SIZE + column] == ELECTRICITY_ZONE_TYPE
-                   for row in range(GRID_SIZE - 1) for column in range(GRID_SIZE)):
-                        continue
-            break
-
-        durations = [d for d in range(1, len(DURATIONS) + 1) for _ in range(DURATIONS[d - 1])]
-        random.shuffle(durations)
-
-        self.zones = [[Zone(row, column, types.pop(), durations.pop(), durations.pop()) for column in range(GRID_SIZE)]
-                      for row in range(GRID_SIZE)]
+            for index in random.choice(ELECTRICITY_PLACEMENTS):
+                types.insert(index, ELECTRICITY_ZONE_TYPE)
+
+            durations = list(DURATIONS_POOL)
+            random.shuffle(durations)
+        else:
+            types = [PAINTING_ZONE_TYPE] * (GRID_SIZE * GRID_SIZE)
+            durations = [1] * len(DURATIONS_POOL)
+
+        #  List of the zones, the zone at coordinates (row, column) is at index row * GRID_SIZE + column
+        #  The durations of the jobs of the zones are taken two by two from the end of the shuffled list
+        self.zones = [Zone(index // GRID_SIZE, index % GRID_SIZE, types[index], duration1, duration2)
+                      for index, (duration1, duration2) in enumerate(zip(durations[::-2], durations[-2::-2]))]
+
+        #  For each zone, in the same order as the zones, the tuple of the neighbor zones
+        self.neighbor_zones = [tuple(self.zones[index] for index in indexes) for indexes in NEIGHBOR_INDEXES]
+
+        #  Bit mask of the finished zones, the bit of index row * GRID_SIZE + column is set when the zone is finished
+        self._finished_mask = 0
+
+        #  Indexes of the zones whose constraint must be checked again by check_constraints: the zones whose jobs, or
+        #  the jobs of a neighbor zone, were started or lengthened since the last check (all the zones at first)
+        self._dirty_indexes = set(range(GRID_SIZE * GRID_SIZE))
+
+    def get_zone(self, row, column):
+        return self.zones[row * GRID_SIZE + column]
+
+    def _set_dirty(self, zone):
+        """
+        Mark the given zone and its neighbors (the constraint of an electricity zone depends on its neighbors) as
+        zones whose constraint must be checked again.
+        """
+        index = zone.index
+        self._dirty_indexes.add(index)
+        self._dirty_indexes.update(NEIGHBOR_INDEXES[index])
+
+    def start_job(self, zone, job, turn):
+        """
+        Start the given job of the given zone of this construction site at the given turn
+        """
+        zone.start(job, turn)
+        self._set_dirty(zone)
+
+    def increase_duration(self, zone, job):
+        """
+        Increase by 1 the duration of the given job of the given zone of this construction site
+        """
+        zone.increase_duration(job)
+        self._set_dirty(zone)
+
+    def end_job(self, zone, job):
+        """
+        Mark the given job of the given zone of this construction site as ended. This method should be called once per
+        job, at the last turn of the job.
+        :param zone: a zone of this construction site
+        :param job: the ended job
+        :return: True if the other job of the zone is already ended, the zone is then finished and marked as finished in
+        the construction site.
+        """
+        if not zone.end(job):
+            return False
+        self._finished_mask |= 1 << zone.index
+        return True
 
     def is_ended(self, turn):
-        return all(zone.is_all_jobs_ended(turn) for row in self.zones for zone in row)
+        """
+        :param turn: the current turn
+        :return: True if all the zones of the construction site were found finished by end_job, at the given turn or
+        before.
+        """
+        return self._finished_mask == ALL_ZONES_FINISHED_MASK
+
+    def check_constraints(self, turn):
+        """
+        :param turn: the current turn
+        :return: the error message of the first zone (in the order of the zones) whose jobs do not satisfy the
+        constraint of its type, or None if the constraints of all the zones are satisfied.
+
+        Only the dirty zones are checked: the constraint of any other zone was satisfied at the previous call and
+        nothing it depends on changed since. The finished zones are skipped too: their jobs can no longer change and a
+        job of a neighbor zone can only start after them, their constraint stays satisfied.
+        """
+        if not self._dirty_indexes:
+            # Nothing started or lengthened since the previous call (most turns of most players)
+            return None
+
+        zones = self.zones
+        neighbor_zones = self.neighbor_zones
+        finished_mask = self._finished_mask
+        dirty_indexes = sorted(self._dirty_indexes)
+        for index in dirty_indexes:
+            if finished_mask >> index & 1:
+                continue
+            zone = zones[index]
+            job_error = zone._constraint_checker(zone, turn, neighbor_zones[index])
+            if job_error is not None:
+                return job_error
+
+        # The constraint of a plumbing zone whose first job is started and whose second job is not depends on the
+        # turn, such a zone remains dirty
+        self._dirty_indexes = {index for index in dirty_indexes
+                               if zones[index]._type == PLUMBING_ZONE_TYPE
+                               and zones[index]._start_turns[FIRST_JOB] is not None
+                               and zones[index]._start_turns[SECOND_JOB] is None}
+        return None
 
     def copy(self):
-        cs = ConstructionSite()
-        for row in range(GRID_SIZE):
-            for column in range(GRID_SIZE):
-                cs.zones[row][column].paste(self.zones[row][column])
+        cs = ConstructionSite(random_zones=False)
+        for zone, copied_zone in zip(cs.zones, self.zones):
+            zone.paste(copied_zone)
+        cs._finished_mask = self._finished_mask
+        cs._dirty_indexes = set(self._dirty_indexes)
         return cs
 
 
@@ -768,21 +980,41 @@ class BeatThePlanReferee(Referee):
 
         super().__init__()
 
-        # List of construction sites for each player
+        # List of construction sites for each player, indexed by the id of the player
         self.construction_site = None
 
-        # List of booleans for each zone, to check if the zone has already been ended by some player
-        self.ended_zones = None
+        # Mask of the zones already ended by some player, the bit 1 << index of the zone is set when the zone is ended
+        # for the first time
+        self.ended_zones_mask = 0
 
-        # List of workers for each player
+        # List of workers for each player, indexed by the id of the player
         self.workers = None
 
-        # Score of each player
+        # Score of each player, indexed by the id of the player
         self.scores = None
 
         # Build instance to manage the shapes of the game
         GuiManager(self)
 
+        # Manager of the shapes of the game, set at the beginning of each game
+        self._gm = None
+
+        # Copy of the attribute gui_enabled, taken at the beginning of each game. If False, the shapes are not animated
+        # during the turns.
+        self._gui_enabled = True
+
+        # Started jobs indexed by the turn at which they end, each job is a tuple (player, index of the worker in the
+        # workers of the player, worker, zone, job). A job whose duration increased is moved to its new last turn
+        # when the previous one is reached.
+        self._jobs_by_last_turn = None
+
+        # For each player, indexed by the id of the player, the list of the other players
+        self._other_players = None
+
+        # Players still playing at the end of the last step of the previous turn where some players may loose, no
+        # player looses between that step and the beginning of the next turn
+        self._playing_players = None
+
     @staticmethod
     def get_author():
         return "Dimitri Watel"
@@ -796,40 +1028,42 @@ class BeatThePlanReferee(Referee):
         return [2, 3, 4]
 
     def add_worker(self, player, is_woman):
-        self.workers[player].append(Worker(is_woman))
+        self.workers[player.id].append(Worker(is_woman))
 
     def _init(self):
-        gm = GuiManager.get_gui_manager()
+        self._gm = GuiManager.get_gui_manager()
+        gm = self._gm
         gm.clear()
+        self._gui_enabled = self.gui_enabled
 
         cs = ConstructionSite()
-        self.ended_zones = [[False for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.scores = {player: 0 for player in self.players}
+        self.ended_zones_mask = 0
+        self.scores = [0] * len(self.players)
 
         gm.build_static_graphics()
         gm.build_construction_sites(cs)
         gm.build_scores()
         gm.build_pauses_zones()
 
-        self.construction_site = {player: ConstructionSite() for player in self.players}
-        for player in self.players:
-            self.construction_site[player] = cs.copy()
+        # Each copy has its own table of the neighbor zones, built once for the whole game
+        self.construction_site = [cs.copy() for _ in self.players]
 
-        self.workers = {player: [] for player in self.players}
+        self.workers = [[] for _ in self.players]
+        self._jobs_by_last_turn = defaultdict(list)
+        self._other_players = [[player2 for player2 in self.players if player2 is not player] for player in self.players]
+        self._playing_players = [player for player in self.players if player.is_playing]
         for player in self.players:
             for i in range(NB_WORKERS):
                 self.add_worker(player, i % 2 == 0)
             gm.add_workers(player)
 
-        for i, player in enumerate(self.players):
-            player.send_input_line_nl(input_msg=[len(self.players), i + 1])
+        for player in self.players:
+            player.send_input_line_nl(input_msg=[len(self.players), player.display_id])
 
-        for row in range(GRID_SIZE):
-            for column in range(GRID_SIZE):
-                zone = cs.zones[row][column]
-                Player.send_input_line_nl_to_all_players(self.players, [row, column, zone.type,
-                                                                             zone.get_duration(FIRST_JOB),
-                                                                             zone.get_duration(SECOND_JOB)])
+        Player.send_input_lines_nl_to_all_players(self.players, [[zone.row, zone.column, zone.type,
+                                                                  zone.get_duration(FIRST_JOB),
+                                                                  zone.get_duration(SECOND_JOB)]
+                                                                 for zone in cs.zones])
 
     def _end(self):
         """
@@ -849,7 +1083,7 @@ class BeatThePlanReferee(Referee):
                 continue
 
             player.send_game_infos(msg)
-            player.win(self.scores[player])
+            player.win(self.scores[player.id])
 
     def check_last_turn(self, turn):
         if turn <= LAST_TURN:
@@ -860,10 +1094,11 @@ class BeatThePlanReferee(Referee):
 
     def check_win(self):
         stop = False
-        for player, score in self.scores.items():
+        for player in self.players:
+            score = self.scores[player.id]
             if player.is_playing and score >= WIN_SCORE:
                 player.send_game_infos(WINNING_SCORE_MSG)
-                player.win(self.scores[player])
+                player.win(score)
                 stop = True
 
         if stop:
@@ -871,41 +1106,39 @@ class BeatThePlanReferee(Referee):
 
         return stop
 
-    def update_scores(self, turn):
-        gm = GuiManager.get_gui_manager()
-        for player in self.players:
-            if not player.is_playing:
-                continue
+    def update_scores(self, turn, playing_players):
+        if not self._gui_enabled:
+            return
+        gm = self._gm
+        for player in playing_players:
 
-            gm.edit_score(turn, player, self.scores[player])
+            gm.edit_score(turn, player, self.scores[player.id])
 
     def read_player_output(self, turn, player, player_output, worker):
         """
         Read the player output and assign the worker accordingly.
         If the output is malformed, the player loose
-        """
-        outputs = player_output.strip()
 
-        if outputs == "PASS":
+        The output is a line returned by Player.get_output_line, it is already stripped.
+        """
+        if player_output == "PASS":
             # No assignment
             return
 
         if worker.is_working:
-            self.destroy(turn, player, WORKER_WOMAN_ERROR if worker.is_woman else WORKER_MAN_ERROR)
+            self.destroy(turn, player, worker.busy_error_msg)
             return
 
-        outputs = outputs.split(' ')
+        outputs = player_output.split(' ')
         if len(outputs) != 3:
             self.destroy(turn, player, COMMAND_ERROR)
             return
 
         try:
-            outputs = [int(x) for x in outputs]
+            row, column, job = int(outputs[0]), int(outputs[1]), int(outputs[2])
         except ValueError:
             self.destroy(turn, player, COMMAND_ERROR)
             return
-
-        row, column, job = outputs
         if row < 0 or row > 3 or column < 0 or column > 3:
             self.destroy(turn, player, OUT_OF_THE_GRID_ERROR % (row, column))
             return
@@ -913,16 +1146,18 @@ class BeatThePlanReferee(Referee):
             self.destroy(turn, player, NO_JOB_ERROR % job)
             return
 
-        cs = self.construction_site[player]
-        zone = cs.zones[row][column]
+        cs = self.construction_site[player.id]
+        zone = cs.get_zone(row, column)
         if zone.is_started(job):
             self.destroy(turn, player, JOB_DONE_ERROR % (row, column, job))
             return
 
-        zone.start(job, turn)
+        cs.start_job(zone, job, turn)
         worker.work(zone, job)
-        gm = GuiManager.get_gui_manager()
-        gm.start_job(turn, player, zone, job, worker, True)
+        self._jobs_by_last_turn[zone.last_turn(job)].append(
+            (player, self.workers[player.id].index(worker), worker, zone, job))
+        if self._gui_enabled:
+            self._gm.start_job(turn, player, zone, job, worker, True)
 
     def send_first_input_to_players(self):
 
@@ -931,17 +1166,17 @@ class BeatThePlanReferee(Referee):
         # If a player has lost, send -1 instead of each coordinate
         for player in self.players:
             Player.send_input_line_nl_to_all_players(players=self.players,
-                                                     input_msg=[player.id + 1, player.is_playing, self.scores[player]])
+                                                     input_msg=[player.display_id, player.is_playing,
+                                                                self.scores[player.id]])
 
-    def read_output_from_players(self, turn):
+    def read_output_from_players(self, turn, playing_players):
         """
         Read the output of all the players, assign workers accordingly
+        :param playing_players: the players still playing at the beginning of the turn
         """
-        for player in self.players:
-            if not player.is_playing:
-                continue
+        for player in playing_players:
 
-            for worker in self.workers[player]:
+            for worker in self.workers[player.id]:
                 player_output = player.get_output_line()
                 # If player returned no output
                 if player_output is None:
@@ -949,104 +1184,101 @@ class BeatThePlanReferee(Referee):
 
                 self.read_player_output(turn, player, player_output, worker)
 
-    def send_second_input_to_players(self, turn):
+    def send_second_input_to_players(self, turn, playing_players):
         # Send the starting and ending jobs of each player
-        gm = GuiManager.get_gui_manager()
+        gm = self._gm
+        gui_enabled = self._gui_enabled
 
         # List the starting and ending jobs
         starting_jobs = []
         ending_jobs = []
 
-        for player in self.players:
-            if not player.is_playing:
-                continue
+        for player in playing_players:
 
-            for i, worker in enumerate(self.workers[player]):
+            for i, worker in enumerate(self.workers[player.id]):
                 if not worker.is_working:
                     continue
                 else:
                     zone = worker.current_working_zone
                     job = worker.current_working_job
 
-                    gm.update_job_slider(turn, player, zone, job)
+                    if gui_enabled:
+                        gm.update_job_slider(turn, player, zone, job)
 
-                    if zone.start_turn(job) == turn:
-                        starting_jobs.append((player.id + 1, i, zone.row, zone.column, job))
-                    if zone.last_turn(job) == turn:
-                        ending_jobs.append((player.id + 1, i, zone.row, zone.column, job))
+                    start_turn = zone.start_turn(job)
+                    last_turn = zone.last_turn(job)
+                    if start_turn == turn or last_turn == turn:
+                        job_info = (player.display_id, i, zone.row, zone.column, job)
+                        if start_turn == turn:
+                            starting_jobs.append(job_info)
+                        if last_turn == turn:
+                            ending_jobs.append(job_info)
 
-        Player.send_input_line_nl_to_all_players(players=self.players,
-                                                 input_msg=[len(starting_jobs), len(ending_jobs)])
+        if not starting_jobs and not ending_jobs:
+            Player.send_encoded_input_lines_to_all_players(self.players, NO_STARTING_OR_ENDING_JOB_MSG)
+            return
 
-        for job_info in starting_jobs + ending_jobs:
-            Player.send_input_line_nl_to_all_players(players=self.players,
-                                                     input_msg=job_info)
+        Player.send_input_lines_nl_to_all_players(players=self.players,
+                                                  input_msgs=[[len(starting_jobs), len(ending_jobs)]] + starting_jobs +
+                                                  ending_jobs)
 
-    def check_zones_constraints(self, turn):
-        for player in self.players:
-            if not player.is_playing:
-                continue
-            cs = self.construction_site[player]
-            for row in range(GRID_SIZE):
-                for column in range(GRID_SIZE):
-                    zone = cs.zones[row][column]
-                    neighbor_zones = []
-                    if row != 0:
-                        neighbor_zones.append(cs.zones[row - 1][column])
-                    if row != 3:
-                        neighbor_zones.append(cs.zones[row + 1][column])
-                    if column != 0:
-                        neighbor_zones.append(cs.zones[row][column - 1])
-                    if column != 3:
-                        neighbor_zones.append(cs.zones[row][column + 1])
-                    job_error = zone.check_constraint(turn, neighbor_zones)
-                    if job_error is not None:
-                        self.destroy(turn, player, job_error)
-                        break
-                if not player.is_playing:
-                     break
-
-    def end_finished_jobs(self, turn):
+    def check_zones_constraints(self, turn, playing_players):
+        for player in playing_players:
+            job_error = self.construction_site[player.id].check_constraints(turn)
+            if job_error is not None:
+                self.destroy(turn, player, job_error)
+
+    def end_finished_jobs(self, turn, playing_players):
         # Stop all ending jobs and update the scores
-        gm = GuiManager.get_gui_manager()
+        gm = self._gm
+        gui_enabled = self._gui_enabled
 
-        for player in self.players:
+        # Only the jobs registered with this last turn may end, the jobs whose duration increased are moved
+        ending_jobs = []
+        for job_info in self._jobs_by_last_turn.pop(turn, ()):
+            player, _, _, zone, job = job_info
             if not player.is_playing:
                 continue
+            last_turn = zone.last_turn(job)
+            if last_turn != turn:
+                self._jobs_by_last_turn[last_turn].append(job_info)
+            else:
+                ending_jobs.append(job_info)
+
+        # The jobs are ended player by player and worker by worker
+        ending_jobs.sort(key=lambda job_info: (job_info[0].id, job_info[1]))
+
+        for player, _, worker, zone, job in ending_jobs:
+            worker.stop_working()
+            if gui_enabled:
+                gm.start_job(turn, player, zone, job, worker, False)
+
+            # Update score if zone is finished (a zone is finished when its last job ends)
+            if not self.construction_site[player.id].end_job(zone, job):
+                continue
 
-            for i, worker in enumerate(self.workers[player]):
-                if not worker.is_working:
-                    continue
-                else:
-                    zone = worker.current_working_zone
-                    job = worker.current_working_job
-                    if zone.last_turn(job) == turn:
-                        worker.stop_working()
-                        gm.start_job(turn, player, zone, job, worker, False)
-
-                    # Update score if zone is finished
-                    if zone.is_finished_for_the_first_time(turn):
-                        self.scores[player] += 1
-                        # Check if this is the first time the zone is ended and update duration of same jobs of other
-                        # players
-                        if self.ended_zones[zone.row][zone.column]:
-                            continue
-
-                        self.ended_zones[zone.row][zone.column] = True
-
-                        # Increase duration of not ended jobs of same zone of other players
-                        for player2 in self.players:
-                            if player2 == player:
-                                continue
-                            cs = self.construction_site[player2]
-                            ozone = cs.zones[zone.row][zone.column]
-                            for ojob in [FIRST_JOB, SECOND_JOB]:
-                                if not ozone.is_started(ojob) or ozone.last_turn(ojob) > turn:
-                                    ozone.increase_duration(ojob)
-                                    gm.increase_job_duration(turn, player2, ozone, ojob)
+            self.scores[player.id] += 1
+            # Check if this is the first time the zone is ended and update duration of same jobs of other
+            # players
+            index = zone.index
+            bit = 1 << index
+            if self.ended_zones_mask & bit:
+                continue
+
+            self.ended_zones_mask |= bit
+
+            # Increase duration of not ended jobs of same zone of other players
+            for player2 in self._other_players[player.id]:
+                cs = self.construction_site[player2.id]
+                ozone = cs.zones[index]
+                for ojob in JOBS:
+                    if not ozone.is_started(ojob) or ozone.last_turn(ojob) > turn:
+                        cs.increase_duration(ozone, ojob)
+                        if gui_enabled:
+                            gm.increase_job_duration(turn, player2, ozone, ojob)
 
         # Update graphics
-        self.update_scores(turn)
+        self.update_scores(turn, playing_players)
 
     def _game_turn(self, turn):
 
@@ -1054,10 +1286,11 @@ class BeatThePlanReferee(Referee):
         if self.check_last_turn(turn):
             return
 
-        final_players = [player for player in self.players if player.is_playing]
-        if len(final_players) == 1:
-            final_players[0].send_game_infos(ONE_PLAYER_LEFT)
-            final_players[0].win(self.scores[final_players[0]])
+        # List of the players still playing, filtered again after each step where some players may loose
+        playing_players = self._playing_players
+        if len(playing_players) == 1:
+            playing_players[0].send_game_infos(ONE_PLAYER_LEFT)
+            playing_players[0].win(self.scores[playing_players[0].id])
             return
 
         if self.check_win():
@@ -1067,15 +1300,18 @@ class BeatThePlanReferee(Referee):
         self.send_first_input_to_players()
 
         # Read the output of all the players, assign workers accordingly
-        self.read_output_from_players(turn)
+        self.read_output_from_players(turn, playing_players)
+        playing_players = [player for player in playing_players if player.is_playing]
 
         # Check of constraints
-        self.check_zones_constraints(turn)
+        self.check_zones_constraints(turn, playing_players)
+        playing_players = [player for player in playing_players if player.is_playing]
+        self._playing_players = playing_players
 
         # Send second part of the input to the players
-        self.send_second_input_to_players(turn)
+        self.send_second_input_to_players(turn, playing_players)
 
-        self.end_finished_jobs(turn)
+        self.end_finished_jobs(turn, playing_players)
 
     def _get_x_max(self):
         return XMAX
@@ -1,45 +1,68 @@
 from abc import ABC, abstractmethod
-from functools import cmp_to_key
-from collections import defaultdict
+from array import array
+from bisect import bisect_left
+import copy
+import io
+import itertools
 import re
 import math
+import sys
 
 
-def keywords_ordering(s1, s2):
+# Format of the hexadecimal string of a color packed in the integer 0xRRGGBB
+HEX_COLOR_FORMAT = '#%06x'
+
+# Format of the beginning of the SVG object representing a shape, filled by Shape.write_svg with the tag, the
+# attributes, the name and the id, the stroke color and width, the fill color and the stroke and fill opacities
+SVG_OPENING_FORMAT = ('<%s %s id="%s%d" stroke="%s" stroke-width="%d" fill="%s" stroke-opacity="%.2f" '
+                      'fill-opacity="%.2f" ')
+
+# Names of the opacity attributes of the keyframes. Contrary to the other names of attributes, they are not identifiers
+# and the literals are not interned by Python, the interned names are shared so that the keyframes lookups compare the
+# keys by identity
+STROKE_OPACITY = sys.intern('stroke-opacity')
+FILL_OPACITY = sys.intern('fill-opacity')
+
+# Rank of the attributes placed before the others in a keyframe, see keywords_key
+KEYWORDS_RANKS = {"translateX": 0, "translateY": 1}
+
+
+def keywords_key(keyvalue):
+    """
+    Key ordering the pairs attribute/value of a keyframe with the natural ordering of the attributes except for the
+    attributes "translateX" and "translateY" which are placed in the first and second places.
+    """
+    keyword = keyvalue[0]
+    return KEYWORDS_RANKS.get(keyword, 2), keyword
+
+
+def clamp_color_value(value):
     """
-    Comparator ordering the string with the natural ordering except for the strings "translateX" and "translateY"
-    which are placed in the first and second places.
+    :param value: a red, green or blue value of a color
+    :return: the value rounded to an integer and set to the closest bound if it is not between 0 and 255
     """
-    if s1 is None and s2 is None:
-        return 0
-    if s1 is None:
-        return -1
-    if s2 is None:
-        return 1
-    if s1 == s2:
-        return 0
-    if s1 == "translateX":
-        return -1
-    if s2 == "translateX":
-        return 1
-    if s1 == "translateY":
-        return -1
-    if s2 == "translateY":
-        return 1
-    return s1 <= s2
-
-
-def get_keyword_key():
-    return cmp_to_key(keywords_ordering)
+    return min(255, max(0, int(value)))
 
 
 class Shape(ABC):
     """
     This class represents a SVG shape.
     The class is, obviously, abstract and should be extended to represent a specific SVG shape as a rectangle.
+
+    Transformations: the translation, the rotation and the scales of a shape are equivalent to the CSS properties
+    translateX, translateY, rotateZ, scaleX and scaleY. The origin of the rotation and of the scales depends on the
+    specific coordinates attributes of the shape (for instance x of Rectangle class). Note that there is a major
+    difference between moving a shape using the translation and moving it using those coordinates attributes: the
+    first one moves the origin of the transformations with the object, the second one does not. It is then possible to
+    translate the shape and keep the same rotation and scale effects.
     """
 
-    _last_id = 0
+    __slots__ = ('_name', '_id', '_stroke_rgb', '_stroke_hex', '_stroke_opacity', '_stroke_width', '_fill_rgb',
+                 '_fill_hex', '_fill_opacity', '_keyframes', '_sorted_keyframes', '_dirty_turns', '_previous_values',
+                 '_last_values', 'translate_x', 'translate_y', 'rotate_z', 'scale_x', 'scale_y', '_has_parent')
+
+    # Generator of the ids of the shapes, restarted by reset_ids
+    _ids = itertools.count()
 
     def __init__(self, name):
         """
@@ -54,19 +77,15 @@ class Shape(ABC):
         self._name = name
 
         # Id of the shape, used to define the id of the SVG tag with the name attribute.
-        self._id = Shape._last_id
-
-        # Increment the next id of the shapes
-        Shape._last_id += 1
-
-        # Red value of the stroke color, should be integer between 0 and 255
-        self._red_stroke_color = 0
+        self._id = next(Shape._ids)
 
-        # Green value of the stroke color, should be integer between 0 and 255
-        self._green_stroke_color = 0
+        # Stroke color, the red, green and blue values (integers between 0 and 255) are packed in the integer
+        # 0xRRGGBB
+        self._stroke_rgb = 0x000000
 
-        # Blue value of the stroke color, should be integer between 0 and 255
-        self._blue_stroke_color = 0
+        # Hexadecimal string of the stroke color, built when it is first needed and reset when the color changes (the
+        # setters of the colors do not reset it if the color is unchanged, for instance when a state is loaded)
+        self._stroke_hex = None
 
         # Stroke opacity of the shape, between 0 and 1. 0 means stroke invisible, and 1 means stroke fully visible.
         self._stroke_opacity = 1
@@ -74,75 +93,48 @@ class Shape(ABC):
         # Width of the stroke of the shape
         self._stroke_width = 1
 
-        # Red value of the fill color, should be integer between 0 and 255
-        self._red_fill_color = 255
+        # Fill color, the red, green and blue values (integers between 0 and 255) are packed in the integer 0xRRGGBB
+        self._fill_rgb = 0xffffff
 
-        # Green value of the fill color, should be integer between 0 and 255
-        self._green_fill_color = 255
-
-        # Blue value of the fill color, should be integer between 0 and 255
-        self._blue_fill_color = 255
+        # Hexadecimal string of the fill color, built when it is first needed and reset when the color changes
+        self._fill_hex = None
 
         # Fill opacity of the shape, between 0 and 1. 0 means fill invisible, and 1 means fill fully visible.
         self._fill_opacity = 1
 
-        # List of keyframes of the shape, used to animate the shape.
+        # Keyframes of the shape, used to animate the shape.
         #
         # The keyframes are organized this way : each keyframe defines a time when an attribute should have a given
         # value. For each attribute, the animation interpolates the value of the attribute linearly between two
         # successive times (except for some attributes that cannot be interpolated such as a text or a font size).
         #
-        # The keys attribute contains a map associating to a time a map containing pairs of attribute/value. Each pair,
-        # associated with the key time is a keyframe of the animation. The pairs are sorted so that the "translateX" and
-        # "translateY" appears first in each list.
-        self._keyframes = defaultdict(dict)
-
-        # Indicate if the pairs in the keyframe lists are sorted.
-        self._sorted = True
-
-        # Horizontal translate value of the shape.
-        #
-        # The translation is equivalent to the CSS translateX property.
-        # Note that there is a major difference between moving a shape using the translation and moving it using the
-        # specific coordinates attributes of the shape (for instance x of Rectangle class). The first one moves the
-        # origin of the transformation with the object. The second one does not. This is important when the rotation
-        # and scale transformations (rotate_z, scale_x, scale_y) are used, because they depends
-        # on where the origin is.
-        self._translate_x = 0
-
-        # Vertical translate value of the shape.
-        #
-        # The translation is equivalent to the CSS translateY property.
-        # Note that there is a major difference between moving a shape using the translation and moving it using the
-        # specific coordinates attributes of the shape (for instance x of Rectangle class). The first one moves the
-        # origin of the transformation with the object. The second one does not. This is important when the rotation
-        # and scale transformations (rotate_z, scale_x, scale_y) are used, because they depends
-        # on where the origin is.
-        self._translate_y = 0
-
-        # Rotate value of the shape.
-        #
-        # The rotation is equivalent to the CSS rotateZ property.
-        # The origin of the rotation depends on the specific coordinates attributes of the shape (for instance
-        # x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        # it is possible to translate the shape and keep the same rotation effect.
-        self._rotate_z = 0
-
-        # Horizontal scale value of the shape.
-        #
-        # The scale is equivalent to the CSS scaleX property.
-        # The origin of the scale depends on the specific coordinates attributes of the shape (for instance
-        # x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        # it is possible to translate the shape and keep the same scale effect.
-        self._scale_x = 1
-        
-        # Vertical scale value of the shape.
-        #
-        # The scale is equivalent to the CSS scaleY property.
-        # The origin of the scale depends on the specific coordinates attributes of the shape (for instance
-        # x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        # it is possible to translate the shape and keep the same scale effect.
-        self._scale_y = 1
+        # They are stored twice, sharing the same maps: the map _keyframes associates to a time a map containing pairs
+        # of attribute/value, and the list _sorted_keyframes contains the pairs (time, map) kept sorted by time when a
+        # time is added. Each pair attribute/value, associated with the time is a keyframe of the animation. Only the
+        # attributes whose value changed since the previous time are stored in a map, the first map contains then all
+        # the attributes (see the keyframes property for the full maps). The pairs of a map are sorted so that the
+        # "translateX" and "translateY" appears first when the keyframes are read (see _get_sorted_keyframes).
+        self._keyframes = dict()
+        self._sorted_keyframes = []
+
+        # Turns of the keyframes modified since the pairs were last sorted, only those keyframes are sorted again.
+        self._dirty_turns = set()
+
+        # Values of all the attributes at the time before the last time of the keyframes, and at the last time of the
+        # keyframes, used to store only the changed attributes of the keyframes added at the end of the animation.
+        self._previous_values = dict()
+        self._last_values = dict()
+
+        # Horizontal and vertical translate values, rotate value and horizontal and vertical scale values of the shape
+        # (see the transformations in the description of the class). They are plain attributes, stored as they are
+        # given. The angle of the rotation should be a string containing an angle in degree followed by 'deg' or an
+        # angle in radian followed by 'rad' or a number followed by turn. For instance '25deg', '1.5rad' or '0.7turn'.
+        # A turn is 360 degree.
+        self.translate_x = 0
+        self.translate_y = 0
+        self.rotate_z = 0
+        self.scale_x = 1
+        self.scale_y = 1
 
         # True if the shape belongs to a group and false otherwise.
         self._has_parent = False
@@ -168,165 +160,30 @@ class Shape(ABC):
 
     @staticmethod
     def reset_ids():
-        Shape._last_id = 0
-
-    @property
-    def translate_x(self):
-        """
-        Return the horizontal translate value of the shape.
-      
-        The translation is equivalent to the CSS translateX property.
-        Note that there is a major difference between moving a shape using the translation and moving it using the
-        specific coordinates attributes of the shape (for instance x of Rectangle class). The first one moves the
-        origin of the transformation with the object. The second one does not. This is important when the rotation
-        and scale transformations (rotate_z, scale_x, scale_y) are used, because
-        they depends on where the origin is.
-      
-        :return: the horizontal translate value of the shape.
-        """
-        return self._translate_x
-
-    @translate_x.setter
-    def translate_x(self, value):
-        """
-        Set the horizontal translate value of the shape.
-      
-        The translation is equivalent to the CSS translateX property.
-        Note that there is a major difference between moving a shape using the translation and moving it using the
-        specific coordinates attributes of the shape (for instance x of Rectangle class). The first one moves the
-        origin of the transformation with the object. The second one does not. This is important when the rotation
-        and scale transformations (rotate_z, scale_x, scale_y) are used, because
-        they depends on where the origin is.
-      
-        :param value: the horizontal translate value of the shape.
-        """
-        self._translate_x = value
-
-    @property
-    def translate_y(self):
-        """
-        Return the vertical translate value of the shape.
-      
-        The translation is equivalent to the CSS translateY property.
-        Note that there is a major difference between moving a shape using the translation and moving it using the
-        specific coordinates attributes of the shape (for instance x of Rectangle class). The first one moves the
-        origin of the transformation with the object. The second one does not. This is important when the rotation
-        and scale transformations (rotate_z, scale_x, scale_y) are used, because
-        they depends on where the origin is.
-      
-       :return: the vertical translate value of the shape.
-        """
-        return self._translate_y
-
-    @translate_y.setter
-    def translate_y(self, value):
-        """
-        Set the vertical translate value of the shape.
-      
-        The translation is equivalent to the CSS translateY property.
-        Note that there is a major difference between moving a shape using the translation and moving it using the
-        specific coordinates attributes of the shape (for instance x of Rectangle class). The first one moves the
-        origin of the transformation with the object. The second one does not. This is important when the rotation
-        and scale transformations (rotate_z, scale_x, scale_y) are used, because
-        they depends on where the origin is.
-      
-        :param value: the vertical translate value of the shape.
-        """
-        self._translate_y = value
-
-    @property
-    def rotate_z(self):
-        """
-        Return the rotate value of the shape.
-      
-        The rotation is equivalent to the CSS rotateZ property.
-
-        The origin of the rotation depends on the specific coordinates attributes of the shape (for instance
-        x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        it is possible to translate the shape and keep the same rotation effect.
-      
-       :return: the rotate value of the shape.
-        """
-        return self._rotate_z
-
-    @rotate_z.setter
-    def rotate_z(self, value):
-        """
-        Set the rotate value of the shape. The angle should be a string containing an angle in degree followed by 'deg'
-        or an angle in radian followed by 'rad' or a number followed by turn. For instance '25deg', '1.5rad' or
-        '0.7turn'. A turn is 360 degree.
-      
-        The rotation is equivalent to the CSS rotateZ property.
-        The origin of the rotation depends on the specific coordinates attributes of the shape (for instance
-        x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        it is possible to translate the shape and keep the same rotation effect.
-      
-        :param value: the rotate value of the shape.
-        """
-        self._rotate_z = value
-
-    @property
-    def scale_x(self):
-        """
-        Return the horizontal scale value of the shape.
-      
-        The scale is equivalent to the CSS scaleX property.
-        The origin of the scale depends on the specific coordinates attributes of the shape (for instance
-        x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        it is possible to translate the shape and keep the same scale effect.
-      
-       :return: the horizontal scale value of the shape.
-        """
-        return self._scale_x
-
-    @scale_x.setter
-    def scale_x(self, value):
-        """
-        Set the horizontal scale value of the shape.
-      
-        The scale is equivalent to the CSS scaleX property.
-        The origin of the scale depends on the specific coordinates attributes of the shape (for instance
-        x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        it is possible to translate the shape and keep the same scale effect.
-      
-        :param value: the horizontal scale value of the shape.
-        """
-        self._scale_x = value
+        Shape._ids = itertools.count()
 
-    @property
-    def scale_y(self):
-        """
-        Return the vertical scale value of the shape.
-      
-        The scale is equivalent to the CSS scaleY property.
-        The origin of the scale depends on the specific coordinates attributes of the shape (for instance
-        x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        it is possible to translate the shape and keep the same scale effect.
-      
-       :return: the vertical scale value of the shape.
+    def clone(self):
         """
-        return self._scale_y
+        Build a copy of this shape, with a new id and without the keyframes. Cloning a shape is faster than building
+        the same shape again.
 
-    @scale_y.setter
-    def scale_y(self, value):
+        :return: the copy of this shape
         """
-        Set the vertical scale value of the shape.
-      
-        The scale is equivalent to the CSS scaleY property.
-        The origin of the scale depends on the specific coordinates attributes of the shape (for instance
-        x of Rectangle class). Note that using the translate attributes moves the origin with the shape so that
-        it is possible to translate the shape and keep the same scale effect.
-      
-        :param value: the vertical scale value of the shape.
-        """
-        self._scale_y = value
+        shape = copy.copy(self)
+        shape._id = next(Shape._ids)
+        shape._keyframes = dict()
+        shape._sorted_keyframes = []
+        shape._dirty_turns = set()
+        shape._previous_values = dict()
+        shape._last_values = dict()
+        return shape
 
     @property
     def red_stroke_color(self):
         """
         :return: the red value of color of the stroke of the shape, integer between 0 and 255.
         """
-        return self._red_stroke_color
+        return self._stroke_rgb >> 16 & 0xff
 
     @red_stroke_color.setter
     def red_stroke_color(self, value):
@@ -336,19 +193,17 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: the red value of the color of the stroke of the shape
         """
-        value = int(value)
-        if value < 0:
-            value = 0
-        if value > 255:
-            value = 255
-        self._red_stroke_color = value
+        rgb = self._stroke_rgb & 0x00ffff | clamp_color_value(value) << 16
+        if rgb != self._stroke_rgb:
+            self._stroke_rgb = rgb
+            self._stroke_hex = None
 
     @property
     def green_stroke_color(self):
         """
         :return: the green value of color of the stroke of the shape, integer between 0 and 255.
         """
-        return self._green_stroke_color
+        return self._stroke_rgb >> 8 & 0xff
 
     @green_stroke_color.setter
     def green_stroke_color(self, value):
@@ -358,19 +213,17 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: the green value of the color of the stroke of the shape
         """
-        value = int(value)
-        if value < 0:
-            value = 0
-        if value > 255:
-            value = 255
-        self._green_stroke_color = value
+        rgb = self._stroke_rgb & 0xff00ff | clamp_color_value(value) << 8
+        if rgb != self._stroke_rgb:
+            self._stroke_rgb = rgb
+            self._stroke_hex = None
 
     @property
     def blue_stroke_color(self):
         """
         :return: the blue value of color of the stroke of the shape, integer between 0 and 255.
         """
-        return self._blue_stroke_color
+        return self._stroke_rgb & 0xff
 
     @blue_stroke_color.setter
     def blue_stroke_color(self, value):
@@ -380,12 +233,10 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: the blue value of the color of the stroke of the shape
         """
-        value = int(value)
-        if value < 0:
-            value = 0
-        if value > 255:
-            value = 255
-        self._blue_stroke_color = value
+        rgb = self._stroke_rgb & 0xffff00 | clamp_color_value(value)
+        if rgb != self._stroke_rgb:
+            self._stroke_rgb = rgb
+            self._stroke_hex = None
 
     @property
     def stroke_color(self):
@@ -393,7 +244,8 @@ class Shape(ABC):
         :return: a tuple containing the red, the green and the blue values of color of the stroke of the shape,
         integers between 0 and 255.
         """
-        return self.red_stroke_color, self.green_stroke_color, self.blue_stroke_color
+        rgb = self._stroke_rgb
+        return rgb >> 16 & 0xff, rgb >> 8 & 0xff, rgb & 0xff
 
     @stroke_color.setter
     def stroke_color(self, value):
@@ -403,21 +255,28 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: a tuple of 3 values, the red, green and blue values of the color of the stroke of the shape
         """
-        self.red_stroke_color, self.green_stroke_color, self.blue_stroke_color = value
+        # The three values are packed at once, the cached hexadecimal string is only reset if the color changes
+        red, green, blue = value
+        rgb = clamp_color_value(red) << 16 | clamp_color_value(green) << 8 | clamp_color_value(blue)
+        if rgb != self._stroke_rgb:
+            self._stroke_rgb = rgb
+            self._stroke_hex = None
 
     def _get_stroke_color(self):
         """
         :return: an hexadecimal string corresponding to the stroke color of the shape
         """
-        return '#{:02x}{:02x}{:02x}'.format(*self.stroke_color)
+        if self._stroke_hex is None:
+            self._stroke_hex = HEX_COLOR_FORMAT % self._stroke_rgb
+        return self._stroke_hex
 
     def _set_stroke_color(self, value):
         """
         Set the stroke color of the shape
         :param value: an hexadecimal string corresponding to the stroke color of the shape
         """
-        value = value.lstrip('#')
-        self.stroke_color = tuple(int(value[i:i+2], 16) for i in (0, 2, 4))
+        value = int(value.lstrip('#'), 16)
+        self.stroke_color = value >> 16 & 0xff, value >> 8 & 0xff, value & 0xff
 
     @property
     def stroke_width(self):
@@ -455,7 +314,7 @@ class Shape(ABC):
         """
         :return: the red value of color of the fill of the shape, integer between 0 and 255.
         """
-        return self._red_fill_color
+        return self._fill_rgb >> 16 & 0xff
 
     @red_fill_color.setter
     def red_fill_color(self, value):
@@ -465,19 +324,17 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: the red value of the color of the fill of the shape
         """
-        value = int(value)
-        if value < 0:
-            value = 0
-        if value > 255:
-            value = 255
-        self._red_fill_color = value
+        rgb = self._fill_rgb & 0x00ffff | clamp_color_value(value) << 16
+        if rgb != self._fill_rgb:
+            self._fill_rgb = rgb
+            self._fill_hex = None
 
     @property
     def green_fill_color(self):
         """
         :return: the green value of color of the fill of the shape, integer between 0 and 255.
         """
-        return self._green_fill_color
+        return self._fill_rgb >> 8 & 0xff
 
     @green_fill_color.setter
     def green_fill_color(self, value):
@@ -487,19 +344,17 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: the green value of the color of the fill of the shape
         """
-        value = int(value)
-        if value < 0:
-            value = 0
-        if value > 255:
-            value = 255
-        self._green_fill_color = value
+        rgb = self._fill_rgb & 0xff00ff | clamp_color_value(value) << 8
+        if rgb != self._fill_rgb:
+            self._fill_rgb = rgb
+            self._fill_hex = None
 
     @property
     def blue_fill_color(self):
         """
         :return: the blue value of color of the fill of the shape, integer between 0 and 255.
         """
-        return self._blue_fill_color
+        return self._fill_rgb & 0xff
 
     @blue_fill_color.setter
     def blue_fill_color(self, value):
@@ -509,12 +364,10 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: the blue value of the color of the fill of the shape
         """
-        value = int(value)
-        if value < 0:
-            value = 0
-        if value > 255:
-            value = 255
-        self._blue_fill_color = value
+        rgb = self._fill_rgb & 0xffff00 | clamp_color_value(value)
+        if rgb != self._fill_rgb:
+            self._fill_rgb = rgb
+            self._fill_hex = None
 
     @property
     def fill_color(self):
@@ -522,7 +375,8 @@ class Shape(ABC):
         :return: a tuple containing the red, the green and the blue values of color of the fill of the shape,
         integers between 0 and 255.
         """
-        return self.red_fill_color, self.green_fill_color, self.blue_fill_color
+        rgb = self._fill_rgb
+        return rgb >> 16 & 0xff, rgb >> 8 & 0xff, rgb & 0xff
 
     @fill_color.setter
     def fill_color(self, value):
@@ -532,21 +386,28 @@ class Shape(ABC):
         If an integer out of the bounds is given, set it to the closest bound
         :param value: a tuple of 3 values, the red, green and blue values of the color of the fill of the shape
         """
-        self.red_fill_color, self.green_fill_color, self.blue_fill_color = value
+        # The three values are packed at once, the cached hexadecimal string is only reset if the color changes
+        red, green, blue = value
+        rgb = clamp_color_value(red) << 16 | clamp_color_value(green) << 8 | clamp_color_value(blue)
+        if rgb != self._fill_rgb:
+            self._fill_rgb = rgb
+            self._fill_hex = None
 
     def _get_fill_color(self):
         """
         :return: an hexadecimal string corresponding to the fill color of the shape
         """
-        return '#{:02x}{:02x}{:02x}'.format(*self.fill_color)
+        if self._fill_hex is None:
+            self._fill_hex = HEX_COLOR_FORMAT % self._fill_rgb
+        return self._fill_hex
 
     def _set_fill_color(self, value):
         """
         Set the fill color of the shape
         :param value: an hexadecimal string corresponding to the fill color of the shape
         """
-        value = value.lstrip('#')
-        self.fill_color = tuple(int(value[i:i+2], 16) for i in (0, 2, 4))
+        value = int(value.lstrip('#'), 16)
+        self.fill_color = value >> 16 & 0xff, value >> 8 & 0xff, value & 0xff
 
     @property
     def fill_opacity(self):
@@ -602,11 +463,18 @@ class Shape(ABC):
         
             :param turn : turn during which the keyframe occurs
         """
-        self._save_translate(turn)
-        self._save_rotate(turn)
-        self._save_scale(turn)
-        self._save_opacity(turn)
-        self._save_fill_and_stroke(turn)
+        self._add_key_frames(turn, self._key_frame_attributes())
+
+    def _key_frame_attributes(self):
+        """
+        Build the map of the attributes saved in a keyframe by save_state. The subclasses add their own attributes to
+        the map built by their parent class, so that all the attributes are saved at once.
+        :return: the map associating the name of each attribute of the shape to its current value
+        """
+        return {'translateX': self.translate_x, 'translateY': self.translate_y, 'rotateZ': self.rotate_z,
+                'scaleX': self.scale_x, 'scaleY': self.scale_y,
+                STROKE_OPACITY: self._stroke_opacity, FILL_OPACITY: self._fill_opacity,
+                'fill': self._get_fill_color(), 'stroke': self._get_stroke_color(), 'strokeWidth': self._stroke_width}
 
     def load_state(self, turn):
         """
@@ -621,135 +489,137 @@ class Shape(ABC):
         self._load_opacity(turn)
         self._load_fill_and_stroke(turn)
 
-    def _save_translate(self, turn):
-        """
-           Save the keyframe containing the attributes corresponding to the translation of the shape
-           :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'translateX', self.translate_x)
-        self._add_key_frame(turn, 'translateY', self.translate_y)
-
     def _load_translate(self, turn):
         """
            Load the keyframe containing the attributes corresponding to the translation of the shape
            :param turn : turn during which the keyframe occurs
         """
-        tx = int(self._get_key_frame(turn, 'translateX'))
+        tx, ty = self._get_key_frames(turn, 'translateX', 'translateY')
         if tx is not None:
-            self.translate_x = tx
-        ty = int(self._get_key_frame(turn, 'translateY'))
+            self.translate_x = int(tx)
         if ty is not None:
-            self.translate_y = ty
-
-    def _save_rotate(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the rotation of the shape
-        :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'rotateZ', self.rotate_z)
+            self.translate_y = int(ty)
 
     def _load_rotate(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the rotation of the shape
         :param turn : turn during which the keyframe occurs
         """
-        rz = float(self._get_key_frame(turn, 'rotateZ'))
+        rz = self._get_key_frame(turn, 'rotateZ')
         if rz is not None:
-            self.rotate_z = rz
-
-    def _save_scale(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the scale of the shape
-        :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'scaleX', self.scale_x)
-        self._add_key_frame(turn, 'scaleY', self.scale_y)
+            self.rotate_z = float(rz)
 
     def _load_scale(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the scale of the shape
         :param turn : turn during which the keyframe occurs
         """
-        sx = float(self._get_key_frame(turn, 'scaleX'))
+        sx, sy = self._get_key_frames(turn, 'scaleX', 'scaleY')
         if sx is not None:
-            self.scale_x = sx
-        sy = float(self._get_key_frame(turn, 'scaleY'))
+            self.scale_x = float(sx)
         if sy is not None:
-            self.scale_y = sy
-
-    def _save_fill_and_stroke(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the fill color and the stroke of the shape
-        :param turn : turn during which the keyframe occurs
-
-        """
-        self._add_key_frame(turn, 'fill', self._get_fill_color())
-        self._add_key_frame(turn, 'stroke', self._get_stroke_color())
-        self._add_key_frame(turn, 'strokeWidth', self.stroke_width)
+            self.scale_y = float(sy)
 
     def _load_fill_and_stroke(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the fill color and the stroke of the shape
         :param turn : turn during which the keyframe occurs
         """
-        cf = str(self._get_key_frame(turn, 'fill'))
+        cf, cs, sw = self._get_key_frames(turn, 'fill', 'stroke', 'strokeWidth')
         if cf is not None:
             self._set_fill_color(cf)
-        cs = str(self._get_key_frame(turn, 'stroke'))
         if cs is not None:
             self._set_stroke_color(cs)
-        sw = int(self._get_key_frame(turn, 'strokeWidth'))
         if sw is not None:
-            self.stroke_width = sw
-
-    def _save_opacity(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the opacity of the shape
-        :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'stroke-opacity', self.stroke_opacity)
-        self._add_key_frame(turn, 'fill-opacity', self.fill_opacity)
+            self.stroke_width = int(sw)
 
     def _load_opacity(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the opacity of the shape
         :param turn : turn during which the keyframe occurs
         """
-        op = float(self._get_key_frame(turn, 'stroke-opacity'))
-        if op is not None:
-            self.stroke_opacity = op
-        op = float(self._get_key_frame(turn, 'fill-opacity'))
-        if op is not None:
-            self.fill_opacity = op
+        sop, fop = self._get_key_frames(turn, STROKE_OPACITY, FILL_OPACITY)
+        if sop is not None:
+            self.stroke_opacity = float(sop)
+        if fop is not None:
+            self.fill_opacity = float(fop)
 
     @property
     def keyframes(self):
         """
-        Return the list of keyframes of the shape, used to animate the shape.
+        Return the keyframes of the shape, used to animate the shape.
       
         The keyframes are organized this way : each keyframe defines a time when an attribute should have a given value.
         For each attribute, the animation interpolates the value of the attribute linearly between two successive times
         (except for some attributes that cannot be interpolated such as a text or a font size).
       
         The keys attribute contains a map associating to a time a map containing pairs of attribute/value. Each pair,
-        associated with the key time is a keyframe of the animation.
+        associated with the key time is a keyframe of the animation. Each map contains the values of all the
+        attributes at its time, it is built from the stored keyframes (which only keep the changed attributes), so
+        modifying it does not edit the keyframes of the shape.
       
-        :return:the list of keyframes of the shape, used to animate the shape.
-        """
-        if not self._sorted:
-
-            # For each dict in the values of self._keyframes, sort that dict so that TranslateX and TranslateY are
-            # sorted first
-            for key in self._keyframes.keys():
-                keywords_key = get_keyword_key()
-                self._keyframes[key] = dict(sorted(self._keyframes[key].items(),
-                                                   key=lambda keyvalue: keywords_key(keyvalue[0])))
-
-            # Sort by key
-            self._keyframes = dict(sorted(self._keyframes.items()))
-            self._sorted = True
-
-        return self._keyframes
+        :return:the keyframes of the shape, used to animate the shape.
+        """
+        keyframes = dict()
+        values = dict()
+        for turn, keyframe in self._sorted_keyframes:
+            values = {**values, **keyframe}
+            keyframes[turn] = dict(sorted(values.items(), key=keywords_key))
+        return keyframes
+
+    def _get_sorted_keyframes(self):
+        """
+        :return: the list of the pairs (time, map) of the keyframes sorted by time, where a map only contains the
+        attributes whose value changed since the previous time. The pairs of the maps are sorted so that the
+        "translateX" and "translateY" attributes appear first.
+        """
+        # For each map modified since the last sort, sort that map so that TranslateX and TranslateY are sorted first
+        # (the map is sorted in place since it is shared by _keyframes and _sorted_keyframes)
+        for key in self._dirty_turns:
+            keyframe = self._keyframes[key]
+            items = sorted(keyframe.items(), key=keywords_key)
+            keyframe.clear()
+            keyframe.update(items)
+        self._dirty_turns.clear()
+
+        return self._sorted_keyframes
+
+    def _insert_key_frames(self, turn, attributes):
+        """
+        Add new keyframes to the shape at a turn preceding the last turn of the keyframes. The keyframes are expanded
+        to the values of all the attributes, updated and then reduced again to the changed attributes, since the
+        attributes stored in the following keyframes depend on the inserted values.
+
+        :param turn : turn during which the keyframes occur
+        :param attributes : map associating the name of each attribute to the value it should have at the given turn
+        """
+        # Values of all the attributes at each time
+        states = []
+        values = dict()
+        for _, keyframe in self._sorted_keyframes:
+            values = {**values, **keyframe}
+            states.append(values)
+
+        # The turns are bisected in their own list, the keyframes are walked anyway to build the states
+        index = bisect_left([time for time, _ in self._sorted_keyframes], turn)
+        keyframe = self._keyframes.get(turn)
+        if keyframe is None:
+            keyframe = self._keyframes[turn] = dict()
+            self._sorted_keyframes.insert(index, (turn, keyframe))
+            states.insert(index, {**states[index - 1], **attributes} if index > 0 else dict(attributes))
+        else:
+            states[index] = {**states[index], **attributes}
+
+        # Store again the changed attributes of each keyframe
+        values = dict()
+        for (time, keyframe), state in zip(self._sorted_keyframes, states):
+            keyframe.clear()
+            keyframe.update({attribute: value for attribute, value in state.items()
+                             if attribute not in values or values[attribute] != value})
+            self._dirty_turns.add(time)
+            values = state
+        self._previous_values = states[-2] if len(states) > 1 else dict()
+        self._last_values = states[-1]
 
     def _add_key_frame(self, turn, attribute_name, value):
         """
@@ -761,17 +631,65 @@ class Shape(ABC):
         :param attribute_name : name of the attribute set by the keyframe
         :param value : value that the attribute should have at the given turn
         """
-        self._sorted = False
-        self._keyframes[turn][attribute_name] = value
+        self._add_key_frames(turn, {attribute_name: value})
+
+    def _add_key_frames(self, turn, attributes):
+        """
+        Add new keyframes to the shape, as _add_key_frame does for each pair attribute/value of the given map. The
+        keyframe of the turn is looked up once for all the attributes.
+
+        Only the attributes whose value changed since the previous time are stored. The keyframes are usually added
+        turn after turn, the values are then compared with the values at the previous time kept by the shape.
+
+        :param turn : turn during which the keyframes occur
+        :param attributes : map associating the name of each attribute to the value it should have at the given turn
+        """
+        sorted_keyframes = self._sorted_keyframes
+        if not sorted_keyframes or sorted_keyframes[-1][0] < turn:
+            # New last time, the values at the previous time are the values at the former last time
+            keyframe = self._keyframes[turn] = dict()
+            sorted_keyframes.append((turn, keyframe))
+            self._previous_values = self._last_values
+            self._last_values = dict(self._last_values)
+        elif sorted_keyframes[-1][0] == turn:
+            keyframe = sorted_keyframes[-1][1]
+        else:
+            self._insert_key_frames(turn, attributes)
+            return
+
+        self._dirty_turns.add(turn)
+        previous_values = self._previous_values
+        self._last_values.update(attributes)
+        for attribute, value in attributes.items():
+            if attribute not in previous_values or previous_values[attribute] != value:
+                keyframe[attribute] = value
+            else:
+                keyframe.pop(attribute, None)
 
     def _get_key_frame(self, turn, attribute_name):
         """
         :param turn : turn during which a keyframe occurs
         :param attribute_name : name of the attribute for which we want to know the value of the keyframe
         :return:the value associated with the given attribute (defined by the given name) in the keyframe of the
-        given turn.
+        given turn, or None if the attribute is not registered in that keyframe (the attributes unchanged since the
+        previous time are not registered, see _add_key_frames).
+        """
+        keyframe = self._keyframes.get(turn)
+        if keyframe is None:
+            return None
+        return keyframe.get(attribute_name)
+
+    def _get_key_frames(self, turn, *attribute_names):
         """
-        return self._keyframes[turn][attribute_name]
+        :param turn : turn during which a keyframe occurs
+        :param attribute_names : names of the attributes for which we want to know the values of the keyframe
+        :return:the tuple of the values associated with the given attributes in the keyframe of the given turn, as
+        _get_key_frame does for each attribute. The keyframe of the turn is looked up once for all the attributes.
+        """
+        keyframe = self._keyframes.get(turn)
+        if keyframe is None:
+            return (None,) * len(attribute_names)
+        return tuple(keyframe.get(attribute_name) for attribute_name in attribute_names)
 
     @abstractmethod
     def tag_svg(self):
@@ -797,46 +715,62 @@ class Shape(ABC):
         """
         return None
 
+    def write_content(self, out):
+        """
+        Write the end of the opening tag and the content of the SVG shape (see get_content) to the given stream, if the
+        shape has a content.
+        :param out: the text stream to which the content is written
+        :return: True if the content was written and False if the shape has no content
+        """
+        content = self.get_content()
+        if content is None:
+            return False
+        out.write('>\n')
+        out.write(content)
+        return True
+
     def to_svg(self):
         """
         Build the SVG objet containing the tag, the attributes and the content representing this shape on the
         following model: <tag attributes>content</tag> if the content is not empty and <tag attributes/> otherwise.
         :return: the built SVG object.
         """
+        out = io.StringIO()
+        self.write_svg(out)
+        return out.getvalue()
+
+    def write_svg(self, out):
+        """
+        Write the SVG objet representing this shape to the given stream, as it is built by to_svg. The children of a
+        group write their SVG objects directly to the same stream.
+        :param out: the text stream to which the SVG object is written
+        """
 
-        try:
-            # Get the value of the first turn and put the shape in the state of that turn
-            first_turn = list(self.keyframes.keys())[0]
-            self.load_state(first_turn)
-        except IndexError:
-            # If no such turn exists, it means there is no animation for this shape
-            # In that case we do nothing, the shape is already in the right state.
-            pass
+        # Get the value of the first turn and put the shape in the state of that turn
+        # If no such turn exists, it means there is no animation for this shape
+        # In that case we do nothing, the shape is already in the right state.
+        if self._sorted_keyframes:
+            self.load_state(self._sorted_keyframes[0][0])
         
         tag = self.tag_svg()
 
-        # Build the beginning part of the object
-        s = ("<%s %s id=\"%s\" stroke=\"%s\" stroke-width=\"%d\" fill=\"%s\" "
-             "stroke-opacity=\"%.2f\" fill-opacity=\"%.2f\" ") % (
-                tag,
-                self.attributes_svg(),
-                self.name + str(self.id),
-                self._get_stroke_color(),
-                self.stroke_width,
-                self._get_fill_color(),
-                self.stroke_opacity,
-                self.fill_opacity)
+        # Write the beginning part of the object
+        out.write(SVG_OPENING_FORMAT % (
+            tag,
+            self.attributes_svg(),
+            self.name,
+            self.id,
+            self._get_stroke_color(),
+            self.stroke_width,
+            self._get_fill_color(),
+            self.stroke_opacity,
+            self.fill_opacity))
 
         # Write the content of the object or close the tag if no such content exists
-        content = self.get_content()
-        if content is None:
-            s += '/>'
+        if self.write_content(out):
+            out.write('\n</%s>' % tag)
         else:
-            s += '>\n'
-            s += content + '\n'
-            s += '</%s>' % tag
-            
-        return s
+            out.write('/>')
 
     def to_animation(self):
         """
@@ -861,71 +795,66 @@ class Shape(ABC):
       
         :return:the list of all the keyframes of the shape.
         """
+        animations_by_turn = self.animations_by_turn()
+
+        # The turns without any keyframe are padded with None
+        animations = [None] * (animations_by_turn[-1][0] + 1)
+        for index, pruned_keys in animations_by_turn:
+            animations[index] = pruned_keys
+        return animations
+
+    def animations_by_turn(self):
+        """
+        Build the maps of the keyframes of the shape grouped by turn, as to_animation does, without padding the turns
+        without any keyframe. The maps of all the shapes can then be merged without walking those turns.
+
+        :return:the list of the pairs (index, map) sorted by index, where the index is the index of the map in the list
+        returned by to_animation.
+        """
         # If no animation is set, we save one state that will be returned
         if len(self._keyframes) == 0:
             self.save_state(1)
 
-        # We get the items (sorted turn by turn)
-        items = list(self.keyframes.items())
+        # We get the items (sorted turn by turn), the first one is read separately
+        items = iter(self._get_sorted_keyframes())
 
-        # List of animations to be returned
+        # List of the pairs (index, map) to be returned
         animations = []
 
         # Get the first item and the turn of that item
-        first_item = items.pop(0)
-        current_turn = first_item[0]
-        current_turn_round = int(current_turn)
-
-        pruned_keys = dict()
-        animations.append(pruned_keys)
+        first_turn, first_keyframe = next(items)
+        current_turn_round = int(first_turn)
 
         # The dict of animations where we do not repeat the keyword if nothing changes since the last key
-        pruned_keys['0.0'] = first_item[1]
-
-        if current_turn != 1 and current_turn_round != 1:
-            # If the first registered turn is not the turn 1,
-            # we pad the first turns with None
-            if len(animations) == 0:
-                animations.append(None)
-            for i in range(2, current_turn_round):
-                animations.append(None)
+        pruned_keys = {'0.0': first_keyframe}
+        index = 0
 
+        if first_turn != 1 and current_turn_round != 1:
+            # If the first registered turn is not the turn 1, the first turns are padded (see to_animation)
+            animations.append((index, pruned_keys))
+            index = max(current_turn_round - 1, 1)
             pruned_keys = dict()
-            if current_turn != current_turn_round:
-                pruned_keys[current_turn - current_turn_round] = dict()
-            animations.append(pruned_keys)
-        elif current_turn != 1:
+            if first_turn != current_turn_round:
+                pruned_keys[first_turn - current_turn_round] = dict()
+        elif first_turn != 1:
             # The first animation starts at 1.XX.
-            if len(animations) == 0:
-                animations.append(pruned_keys)
-            pruned_keys[current_turn - current_turn_round] = dict()
+            pruned_keys[first_turn - current_turn_round] = dict()
 
-        last_item = first_item
         for turn, state in items:
-            #
             turn_round = int(turn)
             if current_turn_round < turn_round:
-                while current_turn_round < turn_round - 1:
-                    # Pad the previous turns with None
-                    current_turn_round += 1
-                    animations.append(None)
-                current_turn_round += 1
+                # The map of the previous turn is complete, the turns between both are padded (see to_animation)
+                animations.append((index, pruned_keys))
+                index += turn_round - current_turn_round
+                current_turn_round = turn_round
                 pruned_keys = dict()
-                animations.append(pruned_keys)
-
-            # Compute the state of the turn by filtering the attributes not changing
-            pruned_state = dict()
-            for attribute, value in state.items():
-                # We check if the value of the attribute changed since last turn
-
-                if last_item[1][attribute] == value:
-                    continue
-                pruned_state[attribute] = value
 
+            # The keyframes only contain the attributes changing since last turn
             # If nothing changed, we do nothing
-            if len(pruned_state) != 0 or turn != turn_round:
-                pruned_keys[turn - turn_round] = pruned_state
-            last_item = (turn, state)
+            if len(state) != 0 or turn != turn_round:
+                pruned_keys[turn - turn_round] = state
+
+        animations.append((index, pruned_keys))
         return animations
 
 
@@ -947,7 +876,9 @@ class Group(Shape):
        
         For instance, let g be a group  containing a horizontal line and a rectangle.
     """
-    
+
+    __slots__ = ('_children', '_descendants', '_parent_groups')
+
     def __init__(self, name):
         """
          Build a new group with no child.
@@ -959,6 +890,11 @@ class Group(Shape):
         # List of shapes belonging to the group.
         self._children = []
 
+        # Set of the descendants of the group (the children and the descendants of the children groups), and list of
+        # the groups having this group as a child, to which the new descendants are added.
+        self._descendants = set()
+        self._parent_groups = []
+
     def add_child(self, child):
         """
         Add the given shape to the list of children of the group.
@@ -969,12 +905,40 @@ class Group(Shape):
            
         :param child : a shape added to this group.
         """
-        if type(child) is Group:
-            if child.has_descendant(self):
+        new_descendants = {child}
+        if isinstance(child, Group):
+            if child is self or self in child._descendants:
                 return
+            new_descendants |= child._descendants
+            child._parent_groups.append(self)
         self._children.append(child)
         child.set_has_parent()
 
+        # Add the new descendants to this group and to its ancestors
+        groups = [self]
+        while groups:
+            group = groups.pop()
+            if not new_descendants <= group._descendants:
+                group._descendants |= new_descendants
+                groups.extend(group._parent_groups)
+
+    def clone(self):
+        """
+        Build a copy of this group, whose children are copies of the children of this group. The children are cloned
+        after the group and in order, so that they get the same ids as if the group and its children were built again.
+
+        :return: the copy of this group
+        """
+        group = super().clone()
+        group._children = [child.clone() for child in self._children]
+        group._descendants = set(group._children)
+        group._parent_groups = []
+        for child in group._children:
+            if isinstance(child, Group):
+                group._descendants |= child._descendants
+                child._parent_groups.append(group)
+        return group
+
     def add_children(self, children):
         """
            Add the given shapes to the list of children of the group.
@@ -993,11 +957,7 @@ class Group(Shape):
         :param shape
         :return: true if the given shape is a descendant of this group (a child or a descendant of a group child)
         """
-        for child in self._children:
-            if child == shape:
-                return True
-            if type(child) is Group and child.has_descendant(shape):
-                return True
+        return shape in self._descendants
 
     def tag_svg(self):
         return 'g'
@@ -1006,17 +966,38 @@ class Group(Shape):
         return ""
 
     def get_content(self):
-        return ''.join([child.to_svg() for child in self._children])
+        return ''.join(child.to_svg() for child in self._children)
 
-    def save_state(self, turn):
-        super().save_state(turn)
+    def write_content(self, out):
+        # The SVG objects of the children are written directly to the stream, without building their strings
+        out.write('>\n')
         for child in self._children:
-            child.save_state(turn)
+            child.write_svg(out)
+        return True
+
+    def save_state(self, turn):
+        # The descendant groups are saved with an explicit stack rather than recursively
+        groups = [self]
+        while groups:
+            group = groups.pop()
+            Shape.save_state(group, turn)
+            for child in group._children:
+                if isinstance(child, Group):
+                    groups.append(child)
+                else:
+                    child.save_state(turn)
 
     def load_state(self, turn):
-        super().load_state(turn)
-        for child in self._children:
-            child.load_state(turn)
+        # The descendant groups are loaded with an explicit stack rather than recursively
+        groups = [self]
+        while groups:
+            group = groups.pop()
+            Shape.load_state(group, turn)
+            for child in group._children:
+                if isinstance(child, Group):
+                    groups.append(child)
+                else:
+                    child.load_state(turn)
 
     @property
     def children(self):
@@ -1025,36 +1006,31 @@ class Group(Shape):
         """
         return iter(self._children)
 
-    @property
-    def red_stroke_color(self):
-        return self._red_stroke_color
-
-    @property
-    def green_stroke_color(self):
-        return self._green_stroke_color
-
-    @property
-    def blue_stroke_color(self):
-        return self._blue_stroke_color
-
-    @red_stroke_color.setter
+    @Shape.red_stroke_color.setter
     def red_stroke_color(self, value):
-        self._red_stroke_color = value
+        Shape.red_stroke_color.fset(self, value)
         for child in self._children:
             child.red_stroke_color = value
 
-    @green_stroke_color.setter
+    @Shape.green_stroke_color.setter
     def green_stroke_color(self, value):
-        self._green_stroke_color = value
+        Shape.green_stroke_color.fset(self, value)
         for child in self._children:
             child.green_stroke_color = value
 
-    @blue_stroke_color.setter
+    @Shape.blue_stroke_color.setter
     def blue_stroke_color(self, value):
-        self._blue_stroke_color = value
+        Shape.blue_stroke_color.fset(self, value)
         for child in self._children:
             child.blue_stroke_color = value
 
+    @Shape.stroke_color.setter
+    def stroke_color(self, value):
+        # The color is set to this group and then to the children, so that the children are walked once
+        Shape.stroke_color.fset(self, value)
+        for child in self._children:
+            child.stroke_color = value
+
     @property
     def stroke_width(self):
         return self._stroke_width
@@ -1065,36 +1041,31 @@ class Group(Shape):
         for child in self._children:
             child.stroke_width = value
 
-    @property
-    def red_fill_color(self):
-        return self._red_fill_color
-
-    @property
-    def green_fill_color(self):
-        return self._green_fill_color
-
-    @property
-    def blue_fill_color(self):
-        return self._blue_fill_color
-
-    @red_fill_color.setter
+    @Shape.red_fill_color.setter
     def red_fill_color(self, value):
-        self._red_fill_color = value
+        Shape.red_fill_color.fset(self, value)
         for child in self._children:
             child.red_fill_color = value
 
-    @green_fill_color.setter
+    @Shape.green_fill_color.setter
     def green_fill_color(self, value):
-        self._green_fill_color = value
+        Shape.green_fill_color.fset(self, value)
         for child in self._children:
             child.green_fill_color = value
 
-    @blue_fill_color.setter
+    @Shape.blue_fill_color.setter
     def blue_fill_color(self, value):
-        self._blue_fill_color = value
+        Shape.blue_fill_color.fset(self, value)
         for child in self._children:
             child.blue_fill_color = value
 
+    @Shape.fill_color.setter
+    def fill_color(self, value):
+        # The color is set to this group and then to the children, so that the children are walked once
+        Shape.fill_color.fset(self, value)
+        for child in self._children:
+            child.fill_color = value
+
     @property
     def stroke_opacity(self):
         """
@@ -1155,6 +1126,9 @@ class Line(Shape):
     """
     Shape representing a SVG line
     """
+
+    __slots__ = ('_x1', '_y1', '_x2', '_y2')
+
     def __init__(self, name, x1, y1, x2, y2):
         """
         Build a new line
@@ -1232,55 +1206,37 @@ class Line(Shape):
         """
         self._y2 = value
 
-    def save_state(self, turn):
-        super().save_state(turn)
-        self._save_p1(turn)
-        self._save_p2(turn)
+    def _key_frame_attributes(self):
+        attributes = super()._key_frame_attributes()
+        attributes.update({'x1': self.x1, 'y1': self.y1, 'x2': self.x2, 'y2': self.y2})
+        return attributes
 
     def load_state(self, turn):
         super().load_state(turn)
         self._load_p1(turn)
         self._load_p2(turn)
 
-    def _save_p1(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the first point of the line
-        :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'x1', self.x1)
-        self._add_key_frame(turn, 'y1', self.y1)
-
     def _load_p1(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the first point of the line
         :param turn : turn during which the keyframe occurs
         """
-        x1 = int(self._get_key_frame(turn, 'x1'))
+        x1, y1 = self._get_key_frames(turn, 'x1', 'y1')
         if x1 is not None:
-            self.x1 = x1
-        y1 = int(self._get_key_frame(turn, 'y1'))
+            self.x1 = int(x1)
         if y1 is not None:
-            self.y1 = y1
-
-    def _save_p2(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the second point of the line
-        :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'x2', self.x2)
-        self._add_key_frame(turn, 'y2', self.y2)
+            self.y1 = int(y1)
 
     def _load_p2(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the second point of the line
         :param turn : turn during which the keyframe occurs
         """
-        x2 = int(self._get_key_frame(turn, 'x2'))
+        x2, y2 = self._get_key_frames(turn, 'x2', 'y2')
         if x2 is not None:
-            self.x2 = x2
-        y2 = int(self._get_key_frame(turn, 'y2'))
+            self.x2 = int(x2)
         if y2 is not None:
-            self.y2 = y2
+            self.y2 = int(y2)
 
     def tag_svg(self):
         return 'line'
@@ -1294,6 +1250,8 @@ class Oval(Shape):
     Shape representing a SVG ellipse/circle
     """
 
+    __slots__ = ('_cx', '_cy', '_rx', '_ry')
+
     def __init__(self, name, cx, cy, rx, ry):
         """
          Build a new oval
@@ -1370,55 +1328,37 @@ class Oval(Shape):
         """
         self._ry = value
 
-    def save_state(self, turn):
-        super().save_state(turn)
-        self._save_center(turn)
-        self._save_radius(turn)
+    def _key_frame_attributes(self):
+        attributes = super()._key_frame_attributes()
+        attributes.update({'cx': self.cx, 'cy': self.cy, 'rx': self.rx, 'ry': self.ry})
+        return attributes
 
     def load_state(self, turn):
         super().load_state(turn)
         self._load_center(turn)
         self._load_radius(turn)
 
-    def _save_center(self, turn):
-        """
-         Save the keyframe containing the attributes corresponding to the center of the oval
-         :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'cx', self.cx)
-        self._add_key_frame(turn, 'cy', self.cy)
-
-    def _save_radius(self, turn):
-        """
-         Save the keyframe containing the attributes corresponding to the radius of the oval
-         :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'rx', self.rx)
-        self._add_key_frame(turn, 'ry', self.ry)
-
     def _load_center(self, turn):
         """
          Load the keyframe containing the attributes corresponding to the center of the oval
          :param turn : turn during which the keyframe occurs
         """
-        cx = int(self._get_key_frame(turn, 'cx'))
+        cx, cy = self._get_key_frames(turn, 'cx', 'cy')
         if cx is not None:
-            self.cx = cx
-        cy = int(self._get_key_frame(turn, 'cy'))
+            self.cx = int(cx)
         if cy is not None:
-            self.cy = cy
+            self.cy = int(cy)
 
     def _load_radius(self, turn):
         """
          Load the keyframe containing the attributes corresponding to the radius of the oval
          :param turn : turn during which the keyframe occurs
         """
-        rx = int(self._get_key_frame(turn, 'rx'))
+        rx, ry = self._get_key_frames(turn, 'rx', 'ry')
         if rx is not None:
-            self.rx = rx
-        ry = int(self._get_key_frame(turn, 'ry'))
+            self.rx = int(rx)
         if ry is not None:
-            self.ry = ry
+            self.ry = int(ry)
 
     def tag_svg(self):
         return 'ellipse'
@@ -1436,6 +1376,8 @@ class Rectangle(Shape):
     Shape representing a SVG rectangle
     """
 
+    __slots__ = ('_x', '_y', '_width', '_height', '_rx', '_ry')
+
     def __init__(self, name, x, y, width, height, rx=0, ry=0):
         """
         :param name: name of the SVG shape of the path, used to define the id of the SVG tag.
@@ -1544,11 +1486,11 @@ class Rectangle(Shape):
         """
         self._ry = value
 
-    def save_state(self, turn):
-        super().save_state(turn)
-        self._save_upper_left_point(turn)
-        self._save_dimensions(turn)
-        self._save_rounded_corners(turn)
+    def _key_frame_attributes(self):
+        attributes = super()._key_frame_attributes()
+        attributes.update({'x': self.x, 'y': self.y, 'width': self.width, 'height': self.height,
+                           'rx': self.rx, 'ry': self.ry})
+        return attributes
 
     def load_state(self, turn):
         super().load_state(turn)
@@ -1556,33 +1498,16 @@ class Rectangle(Shape):
         self._load_dimensions(turn)
         self._load_rounded_corners(turn)
 
-    def _save_upper_left_point(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the upper left corner of the rectangle
-         :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'x', self.x)
-        self._add_key_frame(turn, 'y', self.y)
-
     def _load_upper_left_point(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the upper left corner of the rectangle
          :param turn : turn during which the keyframe occurs
         """
-        x = int(self._get_key_frame(turn, 'x'))
+        x, y = self._get_key_frames(turn, 'x', 'y')
         if x is not None:
-            self.x = x
-        y = int(self._get_key_frame(turn, 'y'))
+            self.x = int(x)
         if y is not None:
-            self.y = y
-
-    def _save_dimensions(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the dimensions of the rectangle
-         :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'width', self.width)
-        self._add_key_frame(turn, 'height', self.height)
+            self.y = int(y)
 
     def _load_dimensions(self, turn):
         """
@@ -1590,33 +1515,22 @@ class Rectangle(Shape):
          :param turn : turn during which the keyframe occurs
 
         """
-        width = int(self._get_key_frame(turn, 'width'))
+        width, height = self._get_key_frames(turn, 'width', 'height')
         if width is not None:
-            self.width = width
-        height = int(self._get_key_frame(turn, 'height'))
+            self.width = int(width)
         if height is not None:
-            self.height = height
-
-    def _save_rounded_corners(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the rounded corners of the rectangle
-         :param turn : turn during which the keyframe occurs
-
-        """
-        self._add_key_frame(turn, 'rx', self.rx)
-        self._add_key_frame(turn, 'ry', self.ry)
+            self.height = int(height)
 
     def _load_rounded_corners(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the rounded corners of the rectangle
          :param turn : turn during which the keyframe occurs
         """
-        rx = int(self._get_key_frame(turn, 'rx'))
+        rx, ry = self._get_key_frames(turn, 'rx', 'ry')
         if rx is not None:
-            self.rx = rx
-        ry = int(self._get_key_frame(turn, 'ry'))
+            self.rx = int(rx)
         if ry is not None:
-            self.ry = ry
+            self.ry = int(ry)
 
     def tag_svg(self):
         return 'rect'
@@ -1628,6 +1542,8 @@ class Rectangle(Shape):
 
 
 class PolyLine(Shape):
+    __slots__ = ('_closed', '_coordinates', '_coordinates_str')
+
     def __init__(self, name, closed, coordinates):
         super().__init__(name)
 
@@ -1635,10 +1551,15 @@ class PolyLine(Shape):
         # polygone.
         self._closed = closed
 
-        # List of all the coordinates of the points of the polyline.
+        # Array of all the coordinates of the points of the polyline, stored as floats since the coordinates of the
+        # regular polygons are not integers.
         # Start with the x of the first point, then the y, then the x of the second point, the y of the second
         # point, ...
-        self._coordinates = coordinates
+        self._coordinates = array('d', coordinates)
+
+        # Formatted coordinates (see coordinates_str), None until the coordinates are formatted. It is reset when the
+        # coordinates are set, the array can not be modified in place since the coordinates property returns a copy.
+        self._coordinates_str = None
 
     @property
     def closed(self):
@@ -1658,47 +1579,52 @@ class PolyLine(Shape):
     @property
     def coordinates(self):
         """
-        return a view to the list of coordinates of the polyline. Modifying this list also edit the list of polyline.
-        :return: the list of coordinates of the polyline
+        return a copy of the array of coordinates of the polyline. Modifying this array does not edit the polyline,
+        the coordinates should be set again with the setter.
+        :return: the array of coordinates of the polyline
         """
-        return self._coordinates
+        return array('d', self._coordinates)
 
     @coordinates.setter
     def coordinates(self, value):
         """
         Set the list of coordinates of the polyline
-        :param value : list of coordinates of the polyline
+        :param value : list (or any iterable) of coordinates of the polyline
         """
-        self._coordinates = value
+        self._coordinates = array('d', value)
+        self._coordinates_str = None
+
+    def clone(self):
+        polyline = super().clone()
+        polyline._coordinates = array('d', self._coordinates)
+        polyline._coordinates_str = None
+        return polyline
 
     @property
     def coordinates_str(self):
         """
         :return: all the pairs of coordinates joined with ", "
         """
-        return '  '.join('%d,%d' % (x, y) for x, y in zip(self._coordinates[::2], self._coordinates[1::2]))
+        if self._coordinates_str is None:
+            coordinates = self._coordinates
+            self._coordinates_str = '  '.join('%d,%d' % (x, y) for x, y in zip(coordinates[::2], coordinates[1::2]))
+        return self._coordinates_str
 
-    def save_state(self, turn):
-        super().save_state(turn)
-        self._save_coordinates(turn)
+    def _key_frame_attributes(self):
+        attributes = super()._key_frame_attributes()
+        attributes.update(points=self.coordinates_str)
+        return attributes
 
     def load_state(self, turn):
         super().load_state(turn)
         self._load_coordinates(turn)
 
-    def _save_coordinates(self, turn):
-        """
-         Save the keyframe containing the attributes corresponding to the coordinates list
-         :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'points', self.coordinates_str)
-
     def _load_coordinates(self, turn):
         """
          Load the keyframe containing the attributes corresponding to the coordinates list
          :param turn : turn during which the keyframe occurs
         """
-        coords = str(self._get_key_frame(turn, 'points'))
+        coords = self._get_key_frame(turn, 'points')
         if coords is None:
             return
         self.coordinates = [int(x) for x in re.split(r'[, ]', coords) if re.match(r'-?\d+', x)]
@@ -1716,6 +1642,8 @@ class RegularePolygon(PolyLine):
     Once the polygon is created, the coordinates should be manipulated with the PolyLine methods
     """
 
+    __slots__ = ()
+
     def __init__(self, name, cx, cy, radius, nb_edges):
         """
         Build a new regular polygon
@@ -1725,13 +1653,15 @@ class RegularePolygon(PolyLine):
         :param radius: radius of the polygon
         :param nb_edges: number of edges of the polygon
         """
-        coords = [cx, cy - radius]
-
         alpha = 2 * math.pi / nb_edges
-        for i in range(1, nb_edges):
-            angle = -math.pi / 2 + i * alpha
-            coords.append(cx + radius * math.cos(angle))
-            coords.append(cy + radius * math.sin(angle))
+        angles = [-math.pi / 2 + i * alpha for i in range(1, nb_edges)]
+
+        # The abscissas and the ordinates of the vertices are interleaved by slice assignments
+        coords = [0] * (2 * nb_edges)
+        coords[0] = cx
+        coords[1] = cy - radius
+        coords[2::2] = [cx + radius * math.cos(angle) for angle in angles]
+        coords[3::2] = [cy + radius * math.sin(angle) for angle in angles]
         super().__init__(name, True, coords)
 
 
@@ -1741,6 +1671,8 @@ class RegulareStar(PolyLine):
     Once the polygon is created, the coordinates should be manipulated with the PolyLine methods
     """
 
+    __slots__ = ()
+
     def __init__(self, name, cx, cy, radius_int, radius_out, nb_sides):
         """
         Build a new regular polygon
@@ -1751,14 +1683,16 @@ class RegulareStar(PolyLine):
         :param radius_out: distance from the center to the tips of the star
         :param nb_sides: number of sides of the star
         """
-        coords = [cx, cy - radius_out]
-
         alpha = 2 * math.pi / (2 * nb_sides)
-        for i in range(1, 2 * nb_sides):
-            angle = -math.pi / 2 + i * alpha
-            radius = radius_out if i % 2 == 0 else radius_int
-            coords.append(cx + radius * math.cos(angle))
-            coords.append(cy + radius * math.sin(angle))
+        angles = [-math.pi / 2 + i * alpha for i in range(1, 2 * nb_sides)]
+        radii = [radius_out if i % 2 == 0 else radius_int for i in range(1, 2 * nb_sides)]
+
+        # The abscissas and the ordinates of the vertices are interleaved by slice assignments
+        coords = [0] * (4 * nb_sides)
+        coords[0] = cx
+        coords[1] = cy - radius_out
+        coords[2::2] = [cx + radius * math.cos(angle) for angle, radius in zip(angles, radii)]
+        coords[3::2] = [cy + radius * math.sin(angle) for angle, radius in zip(angles, radii)]
 
         super().__init__(name, True, coords)
 
@@ -1769,6 +1703,8 @@ class Triangle(PolyLine):
     Once the triangle is created, the coordinates should be manipulated with the PolyLine methods
     """
 
+    __slots__ = ()
+
     def __init__(self, name, x1, y1, x2, y2, x3, y3):
         """
         Create a new triangle
@@ -1780,12 +1716,16 @@ class Text(Shape):
     """
     Shape representing a SVG text
     """
+
+    __slots__ = ('_text', '_x', '_y', '_font_family', '_font_size', '_horizontal_align', '_vertical_align')
+
     def __init__(self, name, x, y, text, font_family, font_size, horizontal_align='middle', vertical_align='middle'):
         """
         :param name: name of the SVG shape of the path, used to define the id of the SVG tag.
         :param x: abscissa of the text. Note that the topleft corner/center of the text depends on the alignment.
         :param y: ordinate of the text. Note that the topleft corner/center of the text depends on the alignment.
-        :param text: Displayed text
+        :param text: Displayed text, any object (for instance an integer) may be given, it is only converted to a
+        string when the text is read or written in the SVG file or the animation
         :param font_family: Font name of the text
         :param font_size: Font size of the text
         :param horizontal_align: Horizontal alignment of the text, "start", "middle" or "end" (for left, center and
@@ -1841,13 +1781,14 @@ class Text(Shape):
         """
         :return:the displayed text
         """
-        return self._text
+        return str(self._text)
 
     @text.setter
     def text(self, value):
         """
         Set the displayed text
-        :param value: the displayed text
+        :param value: the displayed text, or any object (for instance an integer) converted to a string when the text
+        is read
         """
         self._text = value
 
@@ -1955,12 +1896,14 @@ class Text(Shape):
         """
         self.vertical_align = 'baseline'
 
-    def save_state(self, turn):
-        super().save_state(turn)
-        self._save_text(turn)
-        self._save_point(turn)
-        self._save_font(turn)
-        self._save_align(turn)
+    def _key_frame_attributes(self):
+        attributes = super()._key_frame_attributes()
+        # The text is saved as it was given, with its type so that texts equal as values but displayed differently
+        # (such as 1, 1.0 and True) are not taken as unchanged. It is converted into a string by animations_by_turn.
+        attributes.update({'text': (type(self._text), self._text), 'x': self.x, 'y': self.y,
+                           'fontFamily': '"' + self.font_family + '"', 'fontSize': self.font_size,
+                           'textAnchor': self.horizontal_align, 'dominantBaseline': self.vertical_align})
+        return attributes
 
     def load_state(self, turn):
         super().load_state(turn)
@@ -1969,30 +1912,14 @@ class Text(Shape):
         self._load_font(turn)
         self._load_align(turn)
 
-    def _save_text(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the displayed text of the text
-        :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'text', self.text)
-
     def _load_text(self, turn):
         """
         Save the keyframe containing the attributes corresponding to the displayed text of the text
         :param turn : turn during which the keyframe occurs
         """
-        text = str(self._get_key_frame(turn, 'text'))
+        text = self._get_key_frame(turn, 'text')
         if text is not None:
-            self.text = text
-
-    def _save_point(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the coordinates of the text
-         :param turn : turn during which the keyframe occurs
-
-        """
-        self._add_key_frame(turn, 'x', self.x)
-        self._add_key_frame(turn, 'y', self.y)
+            self.text = text[1]
 
     def _load_point(self, turn):
         """
@@ -2000,51 +1927,31 @@ class Text(Shape):
          :param turn : turn during which the keyframe occurs
 
         """
-        x = int(self._get_key_frame(turn, 'x'))
+        x, y = self._get_key_frames(turn, 'x', 'y')
         if x is not None:
-            self.x = x
-        y = int(self._get_key_frame(turn, 'y'))
+            self.x = int(x)
         if y is not None:
-            self.y = y
-
-    def _save_font(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the font of the text
-         :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'fontFamily', '"' + self.font_family + '"')
-        self._add_key_frame(turn, 'fontSize', self.font_size)
+            self.y = int(y)
 
     def _load_font(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the font of the text
          :param turn : turn during which the keyframe occurs
         """
-        ff = str(self._get_key_frame(turn, 'fontFamily'))
+        ff, fs = self._get_key_frames(turn, 'fontFamily', 'fontSize')
         if ff is not None:
-            self.font_family = ff
-        fs = int(self._get_key_frame(turn, 'fontSize'))
+            self.font_family = ff.strip('"')
         if fs is not None:
-            self.font_size = fs
-
-    def _save_align(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the alignment of the text
-         :param turn : turn during which the keyframe occurs
-
-        """
-        self._add_key_frame(turn, 'textAnchor', self.horizontal_align)
-        self._add_key_frame(turn, 'dominantBaseline', self.vertical_align)
+            self.font_size = int(fs)
 
     def _load_align(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the alignment of the text
          :param turn : turn during which the keyframe occurs
         """
-        ta = str(self._get_key_frame(turn, 'textAnchor'))
+        ta, db = self._get_key_frames(turn, 'textAnchor', 'dominantBaseline')
         if ta is not None:
             self.horizontal_align = ta
-        db = str(self._get_key_frame(turn, 'dominantBaseline'))
         if db is not None:
             self.vertical_align = db
 
@@ -2064,12 +1971,33 @@ class Text(Shape):
     def get_content(self):
         return self.text
 
+    @property
+    def keyframes(self):
+        # The displayed texts are saved as they were given with their types, they are converted into strings here
+        keyframes = super().keyframes
+        for keyframe in keyframes.values():
+            if 'text' in keyframe:
+                keyframe['text'] = str(keyframe['text'][1])
+        return keyframes
+
+    def animations_by_turn(self):
+        # The displayed texts are saved as they were given with their types, they are converted into strings here. The
+        # maps containing a text are copied, since the maps of the keyframes are shared with the returned maps.
+        animations = super().animations_by_turn()
+        for _, pruned_keys in animations:
+            for time, keyframe in pruned_keys.items():
+                if 'text' in keyframe:
+                    pruned_keys[time] = {**keyframe, 'text': str(keyframe['text'][1])}
+        return animations
+
 
 class Path(Shape):
     """
     Shape representing a SVG path
     """
 
+    __slots__ = ('_elements',)
+
     class PathElement:
         """
         Contains the information of a specific path element
@@ -2091,6 +2019,8 @@ class Path(Shape):
         # As each category is an integer, to access to the letter, use CATEGORY_TO_LETTER[category]
         CATEGORY_TO_LETTER = 'MLHVZCSQTA'
 
+        __slots__ = ('_category', '_absolute', '_parameters')
+
         def __init__(self, category, absolute, parameters):
             """
             :param category: Type of the path element, one of the constants of the class
@@ -2141,6 +2071,12 @@ class Path(Shape):
 
         self.add_move_element(True, x, y)
 
+    def clone(self):
+        path = super().clone()
+        path._elements = [Path.PathElement(element._category, element._absolute, list(element._parameters))
+                          for element in self._elements]
+        return path
+
     def __getitem__(self, item):
         """
         :param item: index, between 1 and the number of elements of the path minus 1
@@ -2605,27 +2541,21 @@ class Path(Shape):
             function(absolute, *parameters)
             index += parameters_len + 1
 
-    def save_state(self, turn):
-        super().save_state(turn)
-        self._save_description(turn)
+    def _key_frame_attributes(self):
+        attributes = super()._key_frame_attributes()
+        attributes.update(d=self.description)
+        return attributes
 
     def load_state(self, turn):
         super().load_state(turn)
         self._load_description(turn)
 
-    def _save_description(self, turn):
-        """
-        Save the keyframe containing the attributes corresponding to the description of the path
-        :param turn : turn during which the keyframe occurs
-        """
-        self._add_key_frame(turn, 'd', self.description)
-
     def _load_description(self, turn):
         """
         Load the keyframe containing the attributes corresponding to the description of the path
         :param turn : turn during which the keyframe occurs
         """
-        d = str(self._get_key_frame(turn, 'd'))
+        d = self._get_key_frame(turn, 'd')
         if d is not None:
             self.description = d
 
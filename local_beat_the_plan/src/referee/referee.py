@@ -7,7 +7,12 @@ from src.gui.shapes import *
 from src.referee.logs import *
 import json
 import html
-from src.sync.executor_sync import get_program_execution_iterator, check_program
+try:
+    # Optional, only used to write the results faster
+    import orjson
+except ImportError:
+    orjson = None
+from src.sync.executor_sync import get_program_execution_iterator
 from src.sync.execution_exceptions import ExecutionError
 from src.sync.converter_sync import int_to_bin, float_to_bin, bool_to_bin, char_to_bin, bin_to_string
 
@@ -21,11 +26,12 @@ class Referee(ABC):
      For each new game, a referee extending this class should be called.
      The classe contains the following public methods :
      - play(), that should be called first to play a new game, it should not be overwritten.
-     - get_json() and write_result_to_string to build a JSON object or write it to a file containing all
+     - get_results_dict(), get_json() and write_result_to_string to build a JSON object or write it to a file containing all
      the informations of the game (for each turn of the game, standard ouput, errors, information sent to the players
      and the graphics).
      - get_play_by_id(int) to get the player instance knowing its id
      - add_graphic(shape), add_graphics(shapes) to populate the graphical interface of the game with SVG shapes.
+     - the attribute gui_enabled, see below.
 
      It contains the following protected methods that can be overwritten.
      - add_player(name, script) that takes the name of the player, a script filename as
@@ -49,9 +55,15 @@ class Referee(ABC):
         #  List of players of the current game
         self._players = []
 
+        #  Map associating, for each name, the player of the current game with that name
+        self._players_by_name = dict()
+
         #  List of graphics of the current game
         self._graphics = []
 
+        #  Set of the graphics of the current game, to check quickly if a shape was already added
+        self._graphics_set = set()
+
         #  List containing, for each turn, the map associating, for each player, the standard outputs of the player
         #  at that turn
         self._stdouts = []
@@ -67,6 +79,10 @@ class Referee(ABC):
         # Map containing, for each player, the last turn of that player
         self._last_turns = dict()
 
+        # If False, only the scores of the games are read (option -s of local_battle), the referee may then skip the
+        # animation of its shapes during the turns. The graphics of the results are meaningless in that case.
+        self.gui_enabled = True
+
     def play(self, players_scripts):
         """
         Play a new game with the players represented by the script in the list players_scripts
@@ -74,7 +90,9 @@ class Referee(ABC):
         file
         """
         del self._players[:]
+        self._players_by_name.clear()
         del self._graphics[:]
+        self._graphics_set.clear()
         del self._stdouts[:]
         del self._stderrs[:]
         del self._game_infos[:]
@@ -85,6 +103,7 @@ class Referee(ABC):
         for player_id, (player_name, script) in enumerate(players_scripts.items()):
             player = Player(player_id, player_name, script)
             self._players.append(player)
+            self._players_by_name[player_name] = player
 
         for player in self.players:
             if not player.valid_program:
@@ -196,22 +215,22 @@ class Referee(ABC):
         """
         animations = []
         for shape in self._graphics:
-            animations_of_shape = shape.to_animation()
+            # Only the turns with keyframes are read, the turns padded by Shape.to_animation are skipped
+            animations_by_turn = shape.animations_by_turn()
 
-            if animations_of_shape is None:
-                continue
-
-            for _ in range(len(animations_of_shape) - len(animations)):
-                animations.append(None)
+            nb_turns = animations_by_turn[-1][0] + 1
+            if nb_turns > len(animations):
+                animations.extend([None] * (nb_turns - len(animations)))
 
-            for i, animation_of_shape in enumerate(animations_of_shape):
-                if animation_of_shape is None or len(animation_of_shape) == 0:
+            name = shape.name + str(shape.id)
+            for i, animation_of_shape in animations_by_turn:
+                if len(animation_of_shape) == 0:
                     continue
                 animation = animations[i]
                 if animation is None:
                     animation = dict()
                     animations[i] = animation
-                animation[shape.name + str(shape.id)] = animation_of_shape
+                animation[name] = animation_of_shape
 
         return animations
 
@@ -263,10 +282,10 @@ class Referee(ABC):
         """
         pass
 
-    def get_json(self):
+    def get_results_dict(self):
         """
-        :return: a JSON object containing all the informations of the game (for each turn of the game, standard ouput,
-        errors, information sent to the players and the graphics).
+        :return: a dictionary containing all the informations of the game (for each turn of the game, standard ouput,
+        errors, information sent to the players and the graphics), ready to be serialized in JSON.
         """
         json_object = dict()
 
@@ -308,23 +327,40 @@ class Referee(ABC):
         json_object["svg"] = ''.join(self._get_svg())
         json_object["animations"] = self._get_animation()
 
-        return json.dumps(json_object)
+        return json_object
+
+    def get_json(self):
+        """
+        :return: a JSON object containing all the informations of the game (for each turn of the game, standard ouput,
+        errors, information sent to the players and the graphics).
+        """
+        return json.dumps(self.get_results_dict())
+
+    def _get_json_bytes(self):
+        """
+        :return: the JSON object returned by get_json encoded in UTF-8, using orjson when it is installed since it is
+        much faster than the json module on the large animations of a game.
+        """
+        if orjson is None:
+            return self.get_json().encode()
+        # The keys of the animations are not all strings
+        return orjson.dumps(self.get_results_dict(), option=orjson.OPT_NON_STR_KEYS)
 
     def write_results_to(self, filename):
         """
         Write the JSON file returned by get_json to the given file
         :param filename: path to the file where to write the JSON file
         """
-        with open(filename, 'w') as f:
-            f.write(self.get_json())
+        with open(filename, 'wb') as f:
+            f.write(self._get_json_bytes())
 
     def compress_results_to(self, filename):
         """
         Write a GZIP compressed version of the JSON file returned by get_json to the given file
         :param filename: path to the file where to write the compressed JSON file
         """
-        with gzip.open(filename, 'wt') as f:
-            f.write(self.get_json())
+        with gzip.open(filename, 'wb') as f:
+            f.write(self._get_json_bytes())
 
     @property
     def players(self):
@@ -360,10 +396,7 @@ class Referee(ABC):
         :param player_name: name of a player
         :return: the player for which the name is the given name
         """
-        for player in self._players:
-            if player.name == player_name:
-                return player
-        return None
+        return self._players_by_name.get(player_name)
 
     def add_graphic(self, shape):
         """
@@ -374,9 +407,10 @@ class Referee(ABC):
         :param shape: a SVG shape
         """
         # A list is used to keep the ordering
-        if shape in self._graphics:
+        if shape in self._graphics_set:
             return
         self._graphics.append(shape)
+        self._graphics_set.add(shape)
         if type(shape) is not Group:
             return
 
@@ -402,6 +436,7 @@ class Player:
 
     It contains the following public getter methods:
     - id (getter through @property) returns the id of the player
+    - display_id (getter through @property) returns the id of the player plus 1, as it is displayed to the players
     - name (getter through @property) returns the player
 
     It contains the following methods to communicate with the script:
@@ -433,6 +468,12 @@ class Player:
 
     _nb_players = 0
 
+    # Binary strings encoding the boolean inputs and the integer inputs between -INPUT_BIN_STRINGS_BOUND and
+    # INPUT_BIN_STRINGS_BOUND already sent, indexed by the pair (type, value). The games send the same small values
+    # again and again, the larger integers are not kept so that the cache stays small whatever the games played.
+    INPUT_BIN_STRINGS_BOUND = 1024
+    _input_bin_strings = dict()
+
     def __init__(self, player_id, player_name, player_script_filename):
         """
         :param player_id: Id of the player
@@ -444,13 +485,16 @@ class Player:
         # Id of the player
         self._id = player_id
 
+        # Id of the player as it is displayed and sent to the players (starting from 1)
+        self._display_id = player_id + 1
+
         # Name of the player
         self._name = player_name
 
         self._script_filename = player_script_filename
 
         try:
-            check_program(program_filename=player_script_filename)
+            # Raises the same errors as check_program, so that the program is only read once
             self.program = get_program_execution_iterator(program_filename=player_script_filename)
             self._program_error = None
         except Exception as e:
@@ -488,6 +532,10 @@ class Player:
     def id(self):
         return self._id
 
+    @property
+    def display_id(self):
+        return self._display_id
+
     @property
     def name(self):
         return self._name
@@ -529,7 +577,9 @@ class Player:
                     node_line = -1
                     node_char = -1
 
-                    while len(result_out.getvalue()) == 0 and iteration < timeout:
+                    # The position of the stream is 0 as long as nothing was printed, tell does not copy the
+                    # content of the stream contrary to getvalue
+                    while result_out.tell() == 0 and iteration < timeout:
                         try:
                             node_line, node_char = next(self.program)
                             iteration += 1
@@ -641,34 +691,95 @@ class Player:
         :param all_players: true if all the players are in the players list. If players may not contain all the players,
          set to false.
         """
-        if type(input_msg) not in (list, tuple):
-            input_msg = [input_msg]
+        Player.send_input_lines_nl_to_all_players(players, [input_msg], all_players)
 
-        if all_players:
-            log_input_msg(None, ' '.join([str(x) for x in input_msg]))
+    @staticmethod
+    def send_input_lines_nl_to_all_players(players, input_msgs, all_players=True):
+        """
+        Send all the given messages, one after the other, to the standard input of the given players. Each message is
+        sent as with send_input_line_nl_to_all_players, but the messages are encoded only once for all the players.
+
+        :param players: list of players to which the messages are send
+        :param input_msgs: list of messages, each message is an input or a list of inputs.
+        :param all_players: true if all the players are in the players list. If players may not contain all the players,
+         set to false.
+        """
+        Player.send_encoded_input_lines_to_all_players(players, Player.encode_input_lines(input_msgs), all_players)
+
+    @staticmethod
+    def encode_input_lines(input_msgs):
+        """
+        Encode the given messages, so that they can be sent, possibly many times, with
+        send_encoded_input_lines_to_all_players.
+
+        :param input_msgs: list of messages, each message is an input or a list of inputs.
+        :return: a pair containing the list of the messages as they are logged and the list of the 32 bits binary
+        strings of all the inputs of the messages.
+        """
+        texts = []
+        bin_strings = []
+        for input_msg in input_msgs:
+            if type(input_msg) not in (list, tuple):
+                input_msg = [input_msg]
+            texts.append(' '.join([str(x) for x in input_msg]))
+            bin_strings += Player._to_bin_strings(input_msg)
+        return texts, bin_strings
+
+    @staticmethod
+    def send_encoded_input_lines_to_all_players(players, encoded_msgs, all_players=True):
+        """
+        Send messages encoded with encode_input_lines to the standard input of the given players.
+
+        :param players: list of players to which the messages are send
+        :param encoded_msgs: the messages, as returned by encode_input_lines
+        :param all_players: true if all the players are in the players list. If players may not contain all the players,
+         set to false.
+        """
+        texts, bin_strings = encoded_msgs
+        for text in texts:
+            if all_players:
+                log_input_msg(None, text)
+            else:
+                for player in players:
+                    log_input_msg(player, text)
 
         for player in players:
-            player._send_input_line_nl_with_log(not all_players, input_msg)
+            player._stdin_of_this_turn += bin_strings
 
     def _send_input_line_nl_with_log(self, log, input_msg):
         if log:
             log_input_msg(self, ' '.join([str(x) for x in input_msg]))
 
-        bin_msg = 0
+        self._stdin_of_this_turn += Player._to_bin_strings(input_msg)
+
+    @staticmethod
+    def _to_bin_strings(input_msg):
+        """
+        :param input_msg: a list of inputs
+        :return: the list of the 32 bits binary strings encoding the inputs
+        """
+        bin_strings = []
+        bin_string = bin_to_string(0)
+        bound = Player.INPUT_BIN_STRINGS_BOUND
         for input_value in input_msg:
             t = type(input_value)
-            if t is int:
-                bin_msg = int_to_bin(input_value)
+            if t is bool or (t is int and -bound <= input_value <= bound):
+                key = (t, input_value)
+                bin_string = Player._input_bin_strings.get(key)
+                if bin_string is None:
+                    bin_string = bin_to_string(int_to_bin(input_value) if t is int else bool_to_bin(input_value))
+                    Player._input_bin_strings[key] = bin_string
+            elif t is int:
+                bin_string = bin_to_string(int_to_bin(input_value))
             elif t is float:
-                bin_msg = float_to_bin(input_value)
-            elif t is bool:
-                bin_msg = bool_to_bin(input_value)
+                bin_string = bin_to_string(float_to_bin(input_value))
             elif t is str:
                 if len(input_value) == 0:
                     input_value = '\0'
-                bin_msg = char_to_bin(input_value[0])
+                bin_string = bin_to_string(char_to_bin(input_value[0]))
 
-            self._stdin_of_this_turn.append(bin_to_string(bin_msg))
+            bin_strings.append(bin_string)
+        return bin_strings
 
     def win(self, score):
         """
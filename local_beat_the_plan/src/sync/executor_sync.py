@@ -7,6 +7,7 @@ from src.sync.execution_exceptions import *
 from src.sync.precompiled_grammar_sync import PRECOMPILED_GRAMMAR
 from src.sync.converter_sync import *
 from collections import defaultdict
+from functools import lru_cache
 
 
 def check_is_string_is_ascii_printable_with_escape(s):
@@ -1767,13 +1768,23 @@ def _get_program(program_filename=None, input_program=None):
         with open(program_filename, 'r') as f:
             input_program = ''.join(f.readlines())
 
-    SynCParser.pre_compile_grammar(pre_compiled=PRECOMPILED_GRAMMAR)
-    tree = SynCParser.parse(input_program)
+    tree = _parse_program(input_program)
     program = SynCProgram(tree)
 
     return program
 
 
+@lru_cache(maxsize=32)
+def _parse_program(input_program):
+    """
+    :param input_program: une chaîne de caractère contenant un programme SynC
+    :return: l'arbre syntaxique abstrait du programme. L'arbre n'est jamais modifié lors de l'exécution, il est donc
+    gardé en cache pour ne pas analyser à nouveau un programme joué dans plusieurs parties (option -s).
+    """
+    SynCParser.pre_compile_grammar(pre_compiled=PRECOMPILED_GRAMMAR)
+    return SynCParser.parse(input_program)
+
+
 def get_program_execution_iterator(program_filename=None, input_program=None):
     """
     :param program_filename: chemin vers un fichier contenant un programme SynC